@@ -1,14 +1,16 @@
 """CleanGrid Database Models and Pydantic Schemas"""
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, EmailStr
 from typing import List, Optional, Dict, Any
-from datetime import datetime
-from enum import Enum
+from datetime import datetime, timezone
+from enum import StrEnum
 from bson import ObjectId
-import uuid
+from bson.errors import InvalidId
+from pydantic_core import core_schema
+import secrets
 
 # ==================== ENUMS ====================
 
-class UserRole(str, Enum):
+class UserRole(StrEnum):
     CUSTOMER = "customer"
     FRANCHISEE_OWNER = "franchisee_owner"
     FRANCHISEE_STAFF = "franchisee_staff"
@@ -16,7 +18,7 @@ class UserRole(str, Enum):
     SUPPORT = "support"
     WORKFORCE = "workforce"  # Legacy support
 
-class FranchiseeStatus(str, Enum):
+class FranchiseeStatus(StrEnum):
     DRAFT = "draft"
     SUBMITTED = "submitted"
     UNDER_REVIEW = "under_review"
@@ -25,29 +27,29 @@ class FranchiseeStatus(str, Enum):
     SUSPENDED = "suspended"
     TERMINATED = "terminated"
 
-class ComplianceDocType(str, Enum):
+class ComplianceDocType(StrEnum):
     CGL_INSURANCE = "cgl_insurance"
     AUTO_INSURANCE = "auto_insurance"
     WSIB = "wsib"
 
-class ComplianceDocStatus(str, Enum):
+class ComplianceDocStatus(StrEnum):
     PENDING = "pending"
     VERIFIED = "verified"
     EXPIRED = "expired"
     REJECTED = "rejected"
 
-class TerritoryProtectionStatus(str, Enum):
+class TerritoryProtectionStatus(StrEnum):
     PROTECTED = "protected"
     PROBATION = "probation"
     OVERFLOW = "overflow"
     UNASSIGNED = "unassigned"
 
-class BookingStatus(str, Enum):
+class BookingStatus(StrEnum):
     PENDING = "pending"
     CONFIRMED = "confirmed"
     CANCELLED = "cancelled"
 
-class JobStatus(str, Enum):
+class JobStatus(StrEnum):
     PENDING_ASSIGNMENT = "pending_assignment"
     ASSIGNED = "assigned"
     ACCEPTED = "accepted"
@@ -60,13 +62,13 @@ class JobStatus(str, Enum):
     DISPUTED = "disputed"
     CANCELLED = "cancelled"
 
-class WorkOrderStatus(str, Enum):
+class WorkOrderStatus(StrEnum):
     PENDING = "pending"
     SENT = "sent"
     ACKNOWLEDGED = "acknowledged"
     FAILED = "failed"
 
-class PayoutStatus(str, Enum):
+class PayoutStatus(StrEnum):
     PENDING = "pending"
     PROCESSING = "processing"
     PAID = "paid"
@@ -74,21 +76,39 @@ class PayoutStatus(str, Enum):
 
 # ==================== BASE MODELS ====================
 
+_UTC = timezone.utc
+
+def utc_now() -> datetime:
+    """Timezone-aware UTC timestamp; used as the default for *At fields"""
+    return datetime.now(_UTC)
+
 class PyObjectId(ObjectId):
     @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
+    def __get_pydantic_core_schema__(cls, _source_type, _handler):
+        return core_schema.no_info_plain_validator_function(
+            cls.validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(str, when_used="json")
+        )
 
     @classmethod
     def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid objectid")
-        return ObjectId(v)
+        # BSON documents already carry ObjectId instances
+        if isinstance(v, ObjectId):
+            return v
+        # ObjectId(None) would mint a fresh id, so only parse str/bytes
+        if isinstance(v, (str, bytes)):
+            try:
+                return ObjectId(v)
+            except InvalidId:
+                pass
+        raise ValueError("Invalid objectid")
 
     @classmethod
-    def __get_pydantic_json_schema__(cls, schema):
-        schema.update(type="string")
-        return schema
+    def __get_pydantic_json_schema__(cls, _core_schema, _handler):
+        return {"type": "string"}
+
+# Shared config for models mapped from Mongo documents (_id alias)
+DB_MODEL_CONFIG = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
 
 # ==================== USER MODELS ====================
 
@@ -113,12 +133,9 @@ class User(UserBase):
     postalCode: Optional[str] = None
     status: str = "active"
     franchiseeId: Optional[str] = None  # For franchisee_owner/staff
-    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    createdAt: datetime = Field(default_factory=utc_now)
     
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 class Token(BaseModel):
     access_token: str
@@ -147,9 +164,7 @@ class CustomerProfile(BaseModel):
     defaultAddressIndex: int = 0
     stripeCustomerId: Optional[str] = None
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 # ==================== FRANCHISEE MODELS ====================
 
@@ -223,11 +238,9 @@ class Franchisee(BaseModel):
     applicationSubmittedAt: Optional[datetime] = None
     approvedAt: Optional[datetime] = None
     activatedAt: Optional[datetime] = None
-    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    createdAt: datetime = Field(default_factory=utc_now)
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 class ComplianceDocument(BaseModel):
     id: str = Field(alias="_id")
@@ -240,11 +253,9 @@ class ComplianceDocument(BaseModel):
     verifiedAt: Optional[datetime] = None
     verifiedBy: Optional[str] = None
     notes: Optional[str] = None
-    uploadedAt: datetime = Field(default_factory=datetime.utcnow)
+    uploadedAt: datetime = Field(default_factory=utc_now)
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 # ==================== TERRITORY MODELS ====================
 
@@ -265,9 +276,7 @@ class TerritoryFSA(BaseModel):
         "ratingMin": 4.0
     }
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 # ==================== SERVICE MODELS ====================
 
@@ -283,11 +292,9 @@ class Service(BaseModel):
     checklistTemplateId: Optional[str] = None
     photoRequirements: List[str] = []
     isActive: bool = True
-    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    createdAt: datetime = Field(default_factory=utc_now)
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 class AddOn(BaseModel):
     id: str = Field(alias="_id")
@@ -296,9 +303,7 @@ class AddOn(BaseModel):
     price: float
     description: str
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 # ==================== BOOKING MODELS ====================
 
@@ -364,13 +369,11 @@ class Booking(BaseModel):
     # Status
     status: BookingStatus = BookingStatus.PENDING
     
-    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    createdAt: datetime = Field(default_factory=utc_now)
     confirmedAt: Optional[datetime] = None
     cancelledAt: Optional[datetime] = None
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 # ==================== JOB MODELS ====================
 
@@ -423,11 +426,9 @@ class Job(BaseModel):
     franchiseeNotes: Optional[str] = None
     adminNotes: Optional[str] = None
     
-    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    createdAt: datetime = Field(default_factory=utc_now)
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 # ==================== WORK ORDER MODELS ====================
 
@@ -463,11 +464,9 @@ class WorkOrder(BaseModel):
     retryCount: int = 0
     lastError: Optional[str] = None
     
-    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    createdAt: datetime = Field(default_factory=utc_now)
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 # ==================== SETTLEMENT MODELS ====================
 
@@ -476,7 +475,7 @@ class SettlementAdjustment(BaseModel):
     amount: float
     description: str
     jobId: Optional[str] = None
-    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    createdAt: datetime = Field(default_factory=utc_now)
 
 class SettlementStatement(BaseModel):
     id: str = Field(alias="_id")
@@ -500,11 +499,9 @@ class SettlementStatement(BaseModel):
     stripeTransferId: Optional[str] = None
     paidAt: Optional[datetime] = None
     
-    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    createdAt: datetime = Field(default_factory=utc_now)
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 # ==================== SUPPORT MODELS ====================
 
@@ -513,7 +510,7 @@ class SupportTicketMessage(BaseModel):
     senderRole: str
     text: str
     attachments: List[str] = []
-    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    createdAt: datetime = Field(default_factory=utc_now)
 
 class SupportTicket(BaseModel):
     id: str = Field(alias="_id")
@@ -530,12 +527,10 @@ class SupportTicket(BaseModel):
     
     messages: List[SupportTicketMessage] = []
     
-    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    createdAt: datetime = Field(default_factory=utc_now)
     resolvedAt: Optional[datetime] = None
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 # ==================== NOTIFICATION MODELS ====================
 
@@ -547,11 +542,9 @@ class Notification(BaseModel):
     body: str
     data: Dict[str, Any] = {}
     read: bool = False
-    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    createdAt: datetime = Field(default_factory=utc_now)
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 # ==================== AUDIT LOG ====================
 
@@ -564,19 +557,22 @@ class AuditLog(BaseModel):
     resourceId: str
     changes: Dict[str, Any] = {}
     ipAddress: Optional[str] = None
-    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    createdAt: datetime = Field(default_factory=utc_now)
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 # ==================== HELPER FUNCTIONS ====================
 
 def generate_id(prefix: str = "") -> str:
     """Generate a unique ID with optional prefix"""
-    unique = uuid.uuid4().hex[:12]
+    unique = secrets.token_hex(6)  # 6 random bytes -> 12 hex chars
     return f"{prefix}_{unique}" if prefix else unique
 
+_STRIP_SPACES = str.maketrans("", "", " ")
+
 def extract_fsa(postal_code: str) -> str:
     """Extract FSA (first 3 chars) from postal code"""
-    return postal_code.replace(" ", "").upper()[:3]
+    # Fast path: no spaces within the first 3 chars, so only slice those
+    if " " not in postal_code[:3]:
+        return postal_code[:3].upper()
+    return postal_code.translate(_STRIP_SPACES)[:3].upper()
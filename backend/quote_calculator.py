@@ -2,12 +2,39 @@
 Enhanced Quote Calculator with CleanUnits (CU) system
 Handles both residential and commercial pricing with real-time calculations
 """
-from typing import Dict, List, Optional, Any
-from pydantic import BaseModel
+from typing import Dict, List, Optional, Any, Tuple
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from functools import lru_cache
 import math
+import numpy as np
+import orjson
+
+# Max distinct quote inputs memoized per calculator
+QUOTE_CACHE_SIZE = 8192
+
+# CU per 500 sqft block by floor service type
+FLOOR_SERVICE_CU = {
+    "vacuum_mop": 2,
+    "machine_scrub": 6,
+    "buff_polish": 8
+}
+
+# Flat CU by trash service level
+TRASH_SERVICE_CU = {
+    "none": 0,
+    "basic": 2,
+    "heavy": 5
+}
+
+# Add-on line item labels, with and without a quantity suffix
+_ADDON_LABEL_QTY = "{0} × {1}".format
+_ADDON_LABEL = "{0} ".format
 
 class PricingConfig(BaseModel):
     """Pricing configuration per city/zone"""
+    # Calculators snapshot and memoize against it; build a new config to change pricing
+    model_config = ConfigDict(frozen=True)
+    
     # Base fees
     base_fee_residential: float = 35.0
     base_fee_commercial: float = 60.0
@@ -60,12 +87,9 @@ class ResidentialInput(BaseModel):
 
 class CommercialInput(BaseModel):
     """Commercial cleaning inputs"""
-    # Sqft-based (simple)
+    # Sqft-based (room-type based pricing is not implemented yet)
     sqft: Optional[int] = None
     
-    # Room-type based (advanced)
-    area_units: Optional[List[Dict[str, Any]]] = None
-    
     # Additional
     washrooms: int = 0
     kitchenette: bool = False
@@ -82,6 +106,8 @@ class AddOn(BaseModel):
 
 class QuoteRequest(BaseModel):
     """Complete quote request"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     # Common
     job_type: str  # residential, commercial
     postal_code: str
@@ -101,11 +127,15 @@ class QuoteRequest(BaseModel):
 
 class LineItem(BaseModel):
     """Price breakdown line item"""
+    model_config = ConfigDict(frozen=True)
+    
     label: str
     amount: float
 
 class QuoteResponse(BaseModel):
-    """Complete quote response"""
+    """Complete quote response (shared between cache hits, treat as read-only)"""
+    model_config = ConfigDict(frozen=True)
+    
     job_type: str
     postal_code: str
     cu_total: float
@@ -124,94 +154,258 @@ class QuoteResponse(BaseModel):
     recommended_crew_size: int
     line_items: List[LineItem]
 
+def residential_cu(
+    bedrooms: int, bathrooms: int, kitchen: bool, living_rooms: int,
+    dining_rooms: int, stairs: bool, hallways: bool, laundry_room: bool
+) -> float:
+    """Residential CleanUnits from raw scalars (bool flags count as 0/1)"""
+    return float(
+        bedrooms * 3
+        + bathrooms * 5
+        + kitchen * 6
+        + living_rooms * 4
+        + dining_rooms * 2
+        + stairs * 2
+        + hallways * 2
+        + laundry_room * 2
+    )
+
+def commercial_cu(
+    sqft: int, washrooms: int, kitchenette: bool, floor_cu: int,
+    trash_cu: int, high_touch_disinfection: bool
+) -> float:
+    """Commercial CleanUnits from raw scalars, with service tables already resolved"""
+    # Ceil division into 500 sqft blocks
+    blocks = -(-sqft // 500)
+    return float(
+        blocks * (4 + floor_cu + 3 * high_touch_disinfection)
+        + washrooms * 6
+        + kitchenette * 6
+        + trash_cu
+    )
+
+# Shared adapters so scripts/tests reuse one compiled schema per type
+_QUOTE_REQ_ADAPTER = TypeAdapter(QuoteRequest)
+_QUOTE_RESP_ADAPTER = TypeAdapter(QuoteResponse)
+
+class _PackedConfig:
+    """Slotted snapshot of a PricingConfig for hot-path attribute reads"""
+    __slots__ = (
+        "base_fee_res", "base_fee_com", "cu_rate_res", "cu_rate_com",
+        "cond", "svc", "time", "freq", "cu_per_hr", "max_hr"
+    )
+    
+    def __init__(self, config: PricingConfig):
+        self.base_fee_res = config.base_fee_residential
+        self.base_fee_com = config.base_fee_commercial
+        self.cu_rate_res = config.cu_rate_residential
+        self.cu_rate_com = config.cu_rate_commercial
+        # Tables are copied so the snapshot can't drift from the memoized quotes
+        self.cond = dict(config.condition_multipliers)
+        self.svc = dict(config.service_level_multipliers)
+        self.time = dict(config.time_window_multipliers)
+        self.freq = dict(config.frequency_discounts)
+        self.cu_per_hr = config.cu_per_labor_hour
+        self.max_hr = config.max_hours_per_worker_per_job
+
+def _quote_key(request: QuoteRequest) -> tuple:
+    """Hashable signature of every request field that affects the quote"""
+    res = request.residential
+    com = request.commercial
+    return (
+        request.job_type,
+        request.postal_code,
+        request.service_level,
+        request.condition,
+        request.frequency,
+        request.time_window,
+        request.tax_rate,
+        (
+            res.bedrooms, res.bathrooms, res.kitchen, res.living_rooms,
+            res.dining_rooms, res.stairs, res.hallways, res.laundry_room
+        ) if res else None,
+        (
+            com.sqft, com.washrooms, com.kitchenette, com.floor_service,
+            com.trash_service, com.high_touch_disinfection
+        ) if com else None,
+        tuple((a.id, a.name, a.price, a.quantity) for a in request.add_ons),
+    )
+
+class _QuoteCacheKey:
+    """Carries the request through lru_cache while hashing on its signature"""
+    __slots__ = ("key", "request")
+    
+    def __init__(self, request: QuoteRequest):
+        self.key = _quote_key(request)
+        self.request = request
+    
+    def __hash__(self) -> int:
+        return hash(self.key)
+    
+    def __eq__(self, other) -> bool:
+        return self.key == other.key
+
 class QuoteCalculator:
     """Enhanced quote calculator with CleanUnits system"""
     
     def __init__(self, config: Optional[PricingConfig] = None):
         self.config = config or PricingConfig()
+        
+        # Flattened config read on every quote
+        cfg = self._cfg = _PackedConfig(self.config)
+        
+        # Per job type: (CU function, request inputs attr, base fee, CU rate, missing-inputs error)
+        self._commercial_spec = (
+            self.calculate_commercial_cu, "commercial",
+            cfg.base_fee_com, cfg.cu_rate_com,
+            "Commercial inputs required"
+        )
+        self._job_specs = {
+            "residential": (
+                self.calculate_residential_cu, "residential",
+                cfg.base_fee_res, cfg.cu_rate_res,
+                "Residential inputs required"
+            ),
+            "commercial": self._commercial_spec,
+        }
+        
+        # Quotes are pure given the config, so memoize per calculator instance
+        self._cached_quote = lru_cache(maxsize=QUOTE_CACHE_SIZE)(
+            lambda cache_key: self._calculate_quote_dict(cache_key.request)
+        )
     
     def calculate_residential_cu(self, inputs: ResidentialInput) -> float:
         """Calculate CleanUnits for residential"""
-        cu = 0.0
-        cu += inputs.bedrooms * 3
-        cu += inputs.bathrooms * 5
-        cu += 6 if inputs.kitchen else 0
-        cu += inputs.living_rooms * 4
-        cu += inputs.dining_rooms * 2
-        cu += 2 if inputs.stairs else 0
-        cu += 2 if inputs.hallways else 0
-        cu += 2 if inputs.laundry_room else 0
-        return cu
+        return residential_cu(
+            inputs.bedrooms, inputs.bathrooms, inputs.kitchen, inputs.living_rooms,
+            inputs.dining_rooms, inputs.stairs, inputs.hallways, inputs.laundry_room
+        )
     
     def calculate_commercial_cu(self, inputs: CommercialInput) -> float:
         """Calculate CleanUnits for commercial"""
-        cu = 0.0
-        
         if inputs.sqft:
             # Simple sqft-based calculation
-            blocks = math.ceil(inputs.sqft / 500)
-            
-            # Base area
-            cu += blocks * 4
-            
-            # Washrooms
-            cu += inputs.washrooms * 6
-            
-            # Kitchenette
-            cu += 6 if inputs.kitchenette else 0
-            
-            # Floor service
-            if inputs.floor_service:
-                floor_cu_map = {
-                    "vacuum_mop": 2,
-                    "machine_scrub": 6,
-                    "buff_polish": 8
-                }
-                cu += blocks * floor_cu_map.get(inputs.floor_service, 0)
-            
-            # Trash service
-            trash_cu_map = {
-                "none": 0,
-                "basic": 2,
-                "heavy": 5
-            }
-            cu += trash_cu_map.get(inputs.trash_service, 0)
-            
-            # High-touch disinfection
-            if inputs.high_touch_disinfection:
-                cu += blocks * 3
-        
-        elif inputs.area_units:
-            # Advanced room-type based (future enhancement)
-            # For now, default to sqft calculation
-            pass
+            return commercial_cu(
+                inputs.sqft,
+                inputs.washrooms,
+                inputs.kitchenette,
+                FLOOR_SERVICE_CU.get(inputs.floor_service, 0),
+                TRASH_SERVICE_CU.get(inputs.trash_service, 0),
+                inputs.high_touch_disinfection
+            )
         
-        return cu
+        return 0.0
+    
+    @staticmethod
+    def parse_request(payload: Dict[str, Any]) -> QuoteRequest:
+        """Validate a raw dict payload into a QuoteRequest"""
+        return _QUOTE_REQ_ADAPTER.validate_python(payload)
+    
+    @staticmethod
+    def dump_response(response: QuoteResponse) -> bytes:
+        """Serialize a QuoteResponse to JSON bytes"""
+        return _QUOTE_RESP_ADAPTER.dump_json(response)
     
     def calculate_quote(self, request: QuoteRequest) -> QuoteResponse:
-        """Calculate complete quote with line-item breakdown"""
+        """Calculate complete quote with line-item breakdown (memoized)"""
+        return _to_response(self._cached_quote(_QuoteCacheKey(request)))
+    
+    def calculate_quote_json(self, request: QuoteRequest) -> bytes:
+        """Calculate a quote and return it as JSON bytes, bypassing pydantic serialization"""
+        return orjson.dumps(self._cached_quote(_QuoteCacheKey(request)))
+    
+    def calculate_quotes_batch(self, requests: List[QuoteRequest]) -> List[QuoteResponse]:
+        """
+        Calculate many quotes at once (e.g. what-if pricing grids).
+        Per-request inputs are gathered into NumPy arrays and the pricing math
+        runs vectorized; results match calculate_quote for each request.
+        Raises ValueError if any request is missing its job-type inputs.
+        """
+        if not requests:
+            return []
+        
+        cfg = self._cfg
+        cond = cfg.cond.get
+        svc = cfg.svc.get
+        time_window = cfg.time.get
+        freq = cfg.freq.get
+        
+        priced = [self._job_pricing(r) for r in requests]
+        addons = [_addon_lines(r.add_ons) for r in requests]
+        
+        cu_total = np.array([p[0] for p in priced], dtype=np.float64)
+        base_fee = np.array([p[1] for p in priced], dtype=np.float64)
+        cu_rate = np.array([p[2] for p in priced], dtype=np.float64)
+        addons_total = np.array([a[0] for a in addons], dtype=np.float64)
+        multiplier = (
+            np.array([cond(r.condition, 1.0) for r in requests], dtype=np.float64)
+            * np.array([svc(r.service_level, 1.0) for r in requests], dtype=np.float64)
+            * np.array([time_window(r.time_window, 1.0) for r in requests], dtype=np.float64)
+        )
+        frequency_discount_rate = np.array([freq(r.frequency, 0.0) for r in requests], dtype=np.float64)
+        tax_rate = np.array([r.tax_rate for r in requests], dtype=np.float64)
+        
+        # Same operation order as the scalar path, so results are bit-identical
+        labor_subtotal = cu_total * cu_rate
+        labor_with_multiplier = labor_subtotal * multiplier
+        subtotal = base_fee + labor_with_multiplier + addons_total
+        discount_amount = subtotal * frequency_discount_rate
+        total_before_tax = subtotal - discount_amount
+        tax_amount = total_before_tax * tax_rate
+        grand_total = total_before_tax + tax_amount
+        estimated_hours = (cu_total / cfg.cu_per_hr) * multiplier
+        crew_size = np.clip(np.ceil(estimated_hours / cfg.max_hr), 1, 6).astype(np.int64)
+        
+        rows = zip(
+            requests, addons, cu_total.tolist(), base_fee.tolist(), cu_rate.tolist(),
+            multiplier.tolist(), labor_subtotal.tolist(), labor_with_multiplier.tolist(),
+            frequency_discount_rate.tolist(), discount_amount.tolist(), total_before_tax.tolist(),
+            tax_amount.tolist(), grand_total.tolist(), estimated_hours.tolist(), crew_size.tolist()
+        )
+        return [
+            _to_response(_quote_dict(
+                request, row_cu, row_base_fee, row_cu_rate, row_multiplier,
+                row_labor, row_labor_mult, row_addons[0], row_addons[1], row_freq_rate,
+                row_discount, row_total_before_tax, row_tax, row_grand_total,
+                row_hours, row_crew
+            ))
+            for (
+                request, row_addons, row_cu, row_base_fee, row_cu_rate, row_multiplier,
+                row_labor, row_labor_mult, row_freq_rate, row_discount, row_total_before_tax,
+                row_tax, row_grand_total, row_hours, row_crew
+            ) in rows
+        ]
+    
+    def _job_pricing(self, request: QuoteRequest) -> Tuple[float, float, float]:
+        """Return (cu_total, base_fee, cu_rate); anything not residential prices as commercial"""
+        cu_fn, inputs_attr, base_fee, cu_rate, missing_error = self._job_specs.get(
+            request.job_type, self._commercial_spec
+        )
+        inputs = getattr(request, inputs_attr)
+        if not inputs:
+            raise ValueError(missing_error)
+        return cu_fn(inputs), base_fee, cu_rate
+    
+    def _calculate_quote_dict(self, request: QuoteRequest) -> Dict[str, Any]:
+        """Uncached quote calculation; returns plain data shaped like QuoteResponse.
+        
+        The result is shared between cache hits and must not be mutated.
+        """
+        cfg = self._cfg
+        cond = cfg.cond.get
+        svc = cfg.svc.get
+        time_window = cfg.time.get
         
         # Step 1: Calculate CleanUnits
-        if request.job_type == "residential":
-            if not request.residential:
-                raise ValueError("Residential inputs required")
-            cu_total = self.calculate_residential_cu(request.residential)
-            base_fee = self.config.base_fee_residential
-            cu_rate = self.config.cu_rate_residential
-        else:  # commercial
-            if not request.commercial:
-                raise ValueError("Commercial inputs required")
-            cu_total = self.calculate_commercial_cu(request.commercial)
-            base_fee = self.config.base_fee_commercial
-            cu_rate = self.config.cu_rate_commercial
+        cu_total, base_fee, cu_rate = self._job_pricing(request)
         
         # Step 2: Calculate labor subtotal
         labor_subtotal = cu_total * cu_rate
         
         # Step 3: Calculate multiplier
-        condition_mult = self.config.condition_multipliers.get(request.condition, 1.0)
-        service_mult = self.config.service_level_multipliers.get(request.service_level, 1.0)
-        time_mult = self.config.time_window_multipliers.get(request.time_window, 1.0)
+        condition_mult = cond(request.condition, 1.0)
+        service_mult = svc(request.service_level, 1.0)
+        time_mult = time_window(request.time_window, 1.0)
         multiplier = condition_mult * service_mult * time_mult
         
         # Step 4: Calculate subtotal before add-ons
@@ -219,13 +413,13 @@ class QuoteCalculator:
         subtotal_before_addons = base_fee + labor_with_multiplier
         
         # Step 5: Add-ons
-        addons_total = sum(addon.price * addon.quantity for addon in request.add_ons)
+        addons_total, addon_items = _addon_lines(request.add_ons)
         
         # Step 6: Subtotal with add-ons
         subtotal = subtotal_before_addons + addons_total
         
         # Step 7: Apply frequency discount
-        frequency_discount_rate = self.config.frequency_discounts.get(request.frequency, 0.0)
+        frequency_discount_rate = cfg.freq.get(request.frequency, 0.0)
         discount_amount = subtotal * frequency_discount_rate
         total_before_tax = subtotal - discount_amount
         
@@ -234,71 +428,102 @@ class QuoteCalculator:
         grand_total = total_before_tax + tax_amount
         
         # Step 9: Dispatch calculations
-        estimated_hours = (cu_total / self.config.cu_per_labor_hour) * multiplier
-        recommended_crew_size = max(1, min(6, math.ceil(estimated_hours / self.config.max_hours_per_worker_per_job)))
+        estimated_hours = (cu_total / cfg.cu_per_hr) * multiplier
+        recommended_crew_size = max(1, min(6, math.ceil(estimated_hours / cfg.max_hr)))
         
-        # Step 10: Build line items
-        line_items = [
-            LineItem(label="Base visit fee", amount=round(base_fee, 2)),
-            LineItem(
-                label=f"Cleaning units ({int(cu_total)} CU × ${cu_rate})",
-                amount=round(labor_subtotal, 2)
-            ),
-        ]
-        
-        if multiplier > 1.0:
-            multiplier_amount = labor_with_multiplier - labor_subtotal
-            line_items.append(
-                LineItem(
-                    label=f"Condition/service/time multiplier (×{multiplier:.4f})",
-                    amount=round(multiplier_amount, 2)
-                )
-            )
-        
-        if addons_total > 0:
-            for addon in request.add_ons:
-                line_items.append(
-                    LineItem(
-                        label=f"{addon.name} {f'× {addon.quantity}' if addon.quantity > 1 else ''}",
-                        amount=round(addon.price * addon.quantity, 2)
-                    )
-                )
-        
-        if discount_amount > 0:
-            line_items.append(
-                LineItem(
-                    label=f"Frequency discount ({int(frequency_discount_rate * 100)}%)",
-                    amount=round(-discount_amount, 2)
-                )
-            )
-        
-        line_items.append(
-            LineItem(
-                label=f"Tax ({int(request.tax_rate * 100)}%)",
-                amount=round(tax_amount, 2)
-            )
-        )
-        
-        return QuoteResponse(
-            job_type=request.job_type,
-            postal_code=request.postal_code,
-            cu_total=round(cu_total, 2),
-            multiplier=round(multiplier, 4),
-            base_fee=round(base_fee, 2),
-            cu_rate=round(cu_rate, 2),
-            labor_subtotal=round(labor_subtotal, 2),
-            addons_total=round(addons_total, 2),
-            frequency_discount_rate=round(frequency_discount_rate, 2),
-            discount_amount=round(discount_amount, 2),
-            total_before_tax=round(total_before_tax, 2),
-            tax_rate=round(request.tax_rate, 2),
-            tax_amount=round(tax_amount, 2),
-            grand_total=round(grand_total, 2),
-            estimated_hours=round(estimated_hours, 2),
-            recommended_crew_size=recommended_crew_size,
-            line_items=line_items
+        return _quote_dict(
+            request, cu_total, base_fee, cu_rate, multiplier,
+            labor_subtotal, labor_with_multiplier, addons_total, addon_items,
+            frequency_discount_rate, discount_amount, total_before_tax,
+            tax_amount, grand_total, estimated_hours, recommended_crew_size
         )
 
+def _addon_lines(add_ons: List[AddOn]) -> Tuple[float, List[Dict[str, Any]]]:
+    """Add-on total and line items in a single pass"""
+    addons_total = 0.0
+    addon_items = []
+    for addon in add_ons:
+        quantity = addon.quantity
+        amount = addon.price * quantity
+        addons_total += amount
+        addon_items.append({
+            "label": _ADDON_LABEL_QTY(addon.name, quantity) if quantity > 1 else _ADDON_LABEL(addon.name),
+            "amount": round(amount, 2)
+        })
+    return addons_total, addon_items
+
+def _quote_dict(
+    request: QuoteRequest, cu_total: float, base_fee: float, cu_rate: float,
+    multiplier: float, labor_subtotal: float, labor_with_multiplier: float,
+    addons_total: float, addon_items: List[Dict[str, Any]],
+    frequency_discount_rate: float, discount_amount: float, total_before_tax: float,
+    tax_amount: float, grand_total: float, estimated_hours: float,
+    recommended_crew_size: int
+) -> Dict[str, Any]:
+    """Round computed figures and build the line-item breakdown"""
+    # Round each money figure once; reused by line items and totals
+    base_fee_r = round(base_fee, 2)
+    labor_subtotal_r = round(labor_subtotal, 2)
+    discount_amount_r = round(discount_amount, 2)
+    tax_amount_r = round(tax_amount, 2)
+    
+    line_items = [
+        {"label": "Base visit fee", "amount": base_fee_r},
+        {
+            "label": f"Cleaning units ({int(cu_total)} CU × ${cu_rate})",
+            "amount": labor_subtotal_r
+        },
+    ]
+    
+    if multiplier > 1.0:
+        multiplier_amount = labor_with_multiplier - labor_subtotal
+        line_items.append({
+            "label": f"Condition/service/time multiplier (×{multiplier:.4f})",
+            "amount": round(multiplier_amount, 2)
+        })
+    
+    if addons_total > 0:
+        line_items.extend(addon_items)
+    
+    if discount_amount > 0:
+        line_items.append({
+            "label": f"Frequency discount ({int(frequency_discount_rate * 100)}%)",
+            "amount": -discount_amount_r
+        })
+    
+    line_items.append({
+        "label": f"Tax ({int(request.tax_rate * 100)}%)",
+        "amount": tax_amount_r
+    })
+    
+    return dict(
+        job_type=request.job_type,
+        postal_code=request.postal_code,
+        cu_total=round(cu_total, 2),
+        multiplier=round(multiplier, 4),
+        base_fee=base_fee_r,
+        cu_rate=round(cu_rate, 2),
+        labor_subtotal=labor_subtotal_r,
+        addons_total=round(addons_total, 2),
+        frequency_discount_rate=round(frequency_discount_rate, 2),
+        discount_amount=discount_amount_r,
+        total_before_tax=round(total_before_tax, 2),
+        tax_rate=round(request.tax_rate, 2),
+        tax_amount=tax_amount_r,
+        grand_total=round(grand_total, 2),
+        estimated_hours=round(estimated_hours, 2),
+        recommended_crew_size=recommended_crew_size,
+        line_items=line_items
+    )
+
+def _to_response(result: Dict[str, Any]) -> QuoteResponse:
+    """Wrap computed quote data without re-validating it"""
+    item = LineItem.model_construct
+    return QuoteResponse.model_construct(**{
+        **result,
+        "line_items": [item(**line) for line in result["line_items"]]
+    })
+
 # Available add-ons catalog
 AVAILABLE_ADDONS = [
     {"id": "fridge_interior", "name": "Fridge Interior", "price": 35.0},
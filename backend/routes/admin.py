@@ -1,19 +1,164 @@
 """Admin Routes for CleanGrid"""
-from fastapi import APIRouter, HTTPException, Depends, status, Request
-from typing import Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, status, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import AsyncIterator, Dict, List, Optional
 from datetime import datetime, timedelta
+from collections import OrderedDict
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from utils.audit import log_audit
+from utils.hrbank_webhook import get_hrbank_service
+from utils.ids import application_oid, franchisee_oid, job_oid, parse_object_id, settlement_oid
+from utils.projections import project_field
+import asyncio
 import logging
+import time
+import orjson
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/admin", tags=["Admin"])
+router = APIRouter(prefix="/admin", tags=["Admin"], default_response_class=ORJSONResponse)
+
+
+# List endpoint projections: documents leave Mongo already in response shape
+APPLICATION_LIST_PROJECTION = {
+    "_id": 0,
+    "id": {"$toString": "$_id"},
+    "operating_name": project_field("operatingName"),
+    "legal_name": project_field("legalName"),
+    "legal_type": project_field("legalType"),
+    "contact_name": project_field("contactName"),
+    "email": project_field("email"),
+    "phone": project_field("phone"),
+    "city": project_field("city"),
+    "province": project_field("province"),
+    "preferred_fsas": project_field("preferredFSAs", []),
+    "vehicle_access": project_field("vehicleAccess"),
+    "status": project_field("status"),
+    "submitted_at": project_field("applicationSubmittedAt")
+}
+TERRITORY_LIST_PROJECTION = {
+    "_id": 0,
+    "fsa_code": project_field("fsaCode"),
+    "city": project_field("city"),
+    "province": project_field("province"),
+    "franchisee_id": project_field("currentFranchiseeId"),
+    "franchisee_name": project_field("franchiseeName"),
+    "protection_status": project_field("protectionStatus", "unassigned"),
+    "assigned_at": project_field("assignedAt")
+}
+JOB_LIST_PROJECTION = {
+    "_id": 0,
+    "id": {"$toString": "$_id"},
+    "booking_id": project_field("bookingId"),
+    "franchisee_id": project_field("franchiseeId"),
+    "customer_name": project_field("customerName"),
+    "service_name": project_field("serviceName"),
+    "address": project_field("address"),
+    "fsa_code": project_field("fsaCode"),
+    "scheduled_date": project_field("scheduledDate"),
+    "status": project_field("status"),
+    "gross_amount": project_field("grossAmount"),
+    "created_at": project_field("createdAt")
+}
+SETTLEMENT_LIST_PROJECTION = {
+    "_id": 0,
+    "id": {"$toString": "$_id"},
+    "franchisee_id": project_field("franchiseeId"),
+    "franchisee_name": project_field("franchiseeName"),
+    "period_start": project_field("periodStart"),
+    "period_end": project_field("periodEnd"),
+    "job_count": project_field("jobCount"),
+    "gross_revenue": project_field("grossRevenue"),
+    "net_payout": project_field("netPayout"),
+    "payout_status": project_field("payoutStatus")
+}
+
+
+# Rows per cursor batch / streamed chunk for list responses
+STREAM_BATCH_SIZE = 100
+
+# Upper bounds for the `limit` query parameter of list endpoints
+MAX_PAGE_SIZE = 500
+MAX_TERRITORY_PAGE_SIZE = 5000
+
+# In-process cache for dashboard endpoints the admin UI polls: key -> (stored_at, response),
+# in LRU order. Territory keys carry the client's limit/cursor, so the size is capped.
+DASHBOARD_CACHE_TTL = 15
+DASHBOARD_CACHE_SIZE = 256
+_dashboard_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+def _get_cached(key: str) -> Optional[Dict]:
+    entry = _dashboard_cache.get(key)
+    if entry is None:
+        return None
+    if time.monotonic() - entry[0] >= DASHBOARD_CACHE_TTL:
+        del _dashboard_cache[key]
+        return None
+    _dashboard_cache.move_to_end(key)
+    return entry[1]
+
+
+def _set_cached(key: str, response: Dict) -> Dict:
+    _dashboard_cache[key] = (time.monotonic(), response)
+    _dashboard_cache.move_to_end(key)
+    if len(_dashboard_cache) > DASHBOARD_CACHE_SIZE:
+        _dashboard_cache.popitem(last=False)
+    return response
+
+
+def _invalidate_dashboard_cache() -> None:
+    """Drop cached stats/territories after an admin mutation"""
+    _dashboard_cache.clear()
+
+
+async def _resume_after(collection, after: Optional[str], sort_field: str) -> Dict:
+    """Keyset filter continuing a (sort_field desc, _id desc) listing after the row with id `after`"""
+    if not after:
+        return {}
+    oid = parse_object_id(after, "cursor")
+    anchor = await collection.find_one({"_id": oid}, {sort_field: 1})
+    if not anchor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    value = anchor.get(sort_field)
+    # Null/missing values sort after every real value in a descending listing;
+    # $lt never matches them, so they get their own branch
+    if value is None:
+        return {sort_field: None, "_id": {"$lt": oid}}
+    return {"$or": [
+        {sort_field: {"$lt": value}},
+        {sort_field: value, "_id": {"$lt": oid}},
+        {sort_field: None}
+    ]}
+
+
+def _franchisee_name_lookup(id_field: str) -> List[Dict]:
+    """Pipeline stages adding `franchiseeName` from a string franchisee id field"""
+    return [
+        {"$addFields": {"_franchiseeOid": {"$convert": {
+            "input": f"${id_field}", "to": "objectId", "onError": None, "onNull": None
+        }}}},
+        {"$lookup": {
+            "from": "franchisees",
+            "localField": "_franchiseeOid",
+            "foreignField": "_id",
+            "as": "_franchisee"
+        }},
+        {"$addFields": {"franchiseeName": {"$arrayElemAt": ["$_franchisee.operatingName", 0]}}},
+        {"$project": {"_franchiseeOid": 0, "_franchisee": 0}}
+    ]
 
 
 # ==================== FRANCHISEE MANAGEMENT ====================
 
-@router.get("/applications", response_model=Dict)
-async def get_pending_applications(request: Request, status: Optional[str] = None):
+@router.get("/applications")
+async def get_pending_applications(
+    request: Request,
+    status: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None
+):
     """Get franchisee applications for review"""
     db = request.app.state.db
     
@@ -24,54 +169,39 @@ async def get_pending_applications(request: Request, status: Optional[str] = Non
         # Default: show submitted/under_review
         query["status"] = {"$in": ["submitted", "under_review"]}
     # If status == "all", query stays empty to get all
+    query.update(await _resume_after(db.franchisees, after, "applicationSubmittedAt"))
     
-    applications = await db.franchisees.find(query).sort("applicationSubmittedAt", -1).to_list(100)
+    applications = await db.franchisees.aggregate([
+        {"$match": query},
+        {"$sort": {"applicationSubmittedAt": -1, "_id": -1}},
+        {"$limit": limit},
+        {"$project": APPLICATION_LIST_PROJECTION}
+    ]).to_list(limit)
     
     return {
         "success": True,
         "data": {
-            "applications": [{
-                "id": str(a["_id"]),
-                "operating_name": a.get("operatingName"),
-                "legal_name": a.get("legalName"),
-                "legal_type": a.get("legalType"),
-                "contact_name": a.get("contactName"),
-                "email": a.get("email"),
-                "phone": a.get("phone"),
-                "city": a.get("city"),
-                "province": a.get("province"),
-                "preferred_fsas": a.get("preferredFSAs", []),
-                "vehicle_access": a.get("vehicleAccess"),
-                "status": a.get("status"),
-                "submitted_at": a.get("applicationSubmittedAt")
-            } for a in applications]
+            "applications": applications,
+            "next_cursor": applications[-1]["id"] if len(applications) == limit else None
         }
     }
 
 
-@router.patch("/applications/{application_id}/approve", response_model=Dict)
+@router.patch("/applications/{application_id}/approve")
 async def approve_application(
     application_id: str,
     request: Request,
-    approval_data: Optional[dict] = None
+    approval_data: Optional[dict] = None,
+    oid: ObjectId = Depends(application_oid)
 ):
     """Approve a franchisee application"""
     db = request.app.state.db
     approval_data = approval_data or {}
-    
-    franchisee = await db.franchisees.find_one({"_id": ObjectId(application_id)})
-    if not franchisee:
-        raise HTTPException(status_code=404, detail="Application not found")
-    
-    if franchisee.get("status") not in ["submitted", "under_review"]:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Cannot approve application with status: {franchisee.get('status')}"
-        )
+    now = datetime.utcnow()
     
     update_data = {
         "status": "approved",
-        "approvedAt": datetime.utcnow(),
+        "approvedAt": now,
         "approvedBy": approval_data.get("approved_by", "admin")
     }
     
@@ -83,36 +213,54 @@ async def approve_application(
     if approval_data.get("per_job_fee_tier"):
         update_data["perJobFeeTier"] = approval_data["per_job_fee_tier"]
     
-    await db.franchisees.update_one(
-        {"_id": ObjectId(application_id)},
-        {"$set": update_data}
+    # Status precondition in the filter: validate and update in one round trip
+    franchisee = await db.franchisees.find_one_and_update(
+        {"_id": oid, "status": {"$in": ["submitted", "under_review"]}},
+        {"$set": update_data},
+        projection={"_id": 1},
+        return_document=ReturnDocument.BEFORE
     )
+    if not franchisee:
+        franchisee = await db.franchisees.find_one({"_id": oid}, {"status": 1})
+        if not franchisee:
+            raise HTTPException(status_code=404, detail="Application not found")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot approve application with status: {franchisee.get('status')}"
+        )
     
-    # Create audit log
-    await db.audit_logs.insert_one({
+    # Queue the audit log for the batched writer
+    # approvedAt is the entry's createdAt, so it isn't repeated under changes
+    log_audit({
         "_id": ObjectId(),
-        "actorId": approval_data.get("approved_by", "admin"),
+        "actorId": update_data["approvedBy"],
         "actorRole": "admin",
         "action": "franchisee_application_approved",
         "resourceType": "franchisee",
         "resourceId": application_id,
-        "changes": update_data,
-        "createdAt": datetime.utcnow()
+        "changes": {k: v for k, v in update_data.items() if k != "approvedAt"},
+        "createdAt": now
     })
     
+    _invalidate_dashboard_cache()
+    
     return {
         "success": True,
         "message": "Application approved. Franchisee can now complete onboarding."
     }
 
 
-@router.patch("/applications/{application_id}/reject", response_model=Dict)
-async def reject_application(application_id: str, request: Request, rejection_data: dict):
+@router.patch("/applications/{application_id}/reject")
+async def reject_application(
+    request: Request,
+    rejection_data: dict,
+    oid: ObjectId = Depends(application_oid)
+):
     """Reject a franchisee application"""
     db = request.app.state.db
     
     await db.franchisees.update_one(
-        {"_id": ObjectId(application_id)},
+        {"_id": oid},
         {
             "$set": {
                 "status": "rejected",
@@ -122,18 +270,25 @@ async def reject_application(application_id: str, request: Request, rejection_da
         }
     )
     
+    _invalidate_dashboard_cache()
+    
     return {
         "success": True,
         "message": "Application rejected"
     }
 
 
-@router.patch("/franchisees/{franchisee_id}/activate", response_model=Dict)
-async def activate_franchisee(franchisee_id: str, request: Request):
+@router.patch("/franchisees/{franchisee_id}/activate")
+async def activate_franchisee(
+    franchisee_id: str,
+    request: Request,
+    oid: ObjectId = Depends(franchisee_oid)
+):
     """Activate a franchisee after all compliance gates are met"""
     db = request.app.state.db
+    now = datetime.utcnow()
     
-    franchisee = await db.franchisees.find_one({"_id": ObjectId(franchisee_id)})
+    franchisee = await db.franchisees.find_one({"_id": oid})
     if not franchisee:
         raise HTTPException(status_code=404, detail="Franchisee not found")
     
@@ -150,13 +305,18 @@ async def activate_franchisee(franchisee_id: str, request: Request):
     if franchisee.get("province") == "ON":
         required_docs.append("wsib")
     
-    for doc_type in required_docs:
-        doc = await db.compliance_documents.find_one({
+    verified_docs = await db.compliance_documents.find(
+        {
             "franchiseeId": franchisee_id,
-            "docType": doc_type,
+            "docType": {"$in": required_docs},
             "status": "verified"
-        })
-        if not doc:
+        },
+        {"docType": 1}
+    ).to_list(None)
+    verified_types = {d["docType"] for d in verified_docs}
+    
+    for doc_type in required_docs:
+        if doc_type not in verified_types:
             raise HTTPException(
                 status_code=400,
                 detail=f"Missing verified {doc_type} document"
@@ -169,30 +329,43 @@ async def activate_franchisee(franchisee_id: str, request: Request):
             detail="HR Bank employer ID not configured"
         )
     
-    # Activate
-    await db.franchisees.update_one(
-        {"_id": ObjectId(franchisee_id)},
+    # Activate; the status precondition guards against a concurrent transition
+    franchisee = await db.franchisees.find_one_and_update(
+        {"_id": oid, "status": "approved"},
         {
             "$set": {
                 "status": "activated",
-                "activatedAt": datetime.utcnow()
+                "activatedAt": now
             }
-        }
+        },
+        projection={"assignedFSAs": 1},
+        return_document=ReturnDocument.AFTER
     )
+    if not franchisee:
+        raise HTTPException(
+            status_code=400,
+            detail="Franchisee must be approved before activation"
+        )
     
     # Update territories
-    for fsa in franchisee.get("assignedFSAs", []):
-        await db.territories.update_one(
+    territory_ops = [
+        UpdateOne(
             {"fsaCode": fsa},
             {
                 "$set": {
                     "currentFranchiseeId": franchisee_id,
-                    "assignedAt": datetime.utcnow(),
+                    "assignedAt": now,
                     "protectionStatus": "protected"
                 }
             },
             upsert=True
         )
+        for fsa in franchisee.get("assignedFSAs", [])
+    ]
+    if territory_ops:
+        await db.territories.bulk_write(territory_ops, ordered=False)
+    
+    _invalidate_dashboard_cache()
     
     return {
         "success": True,
@@ -202,37 +375,39 @@ async def activate_franchisee(franchisee_id: str, request: Request):
 
 # ==================== TERRITORY MANAGEMENT ====================
 
-@router.get("/territories", response_model=Dict)
-async def get_territories(request: Request):
-    """Get all territories (FSAs)"""
-    db = request.app.state.db
+@router.get("/territories")
+async def get_territories(
+    request: Request,
+    limit: int = Query(1000, ge=1, le=MAX_TERRITORY_PAGE_SIZE),
+    after: Optional[str] = None
+):
+    """Get territories (FSAs) in FSA order; pass `after` = previous `next_cursor` for the next page"""
+    cache_key = f"territories:{limit}:{after}"
+    cached = _get_cached(cache_key)
+    if cached:
+        return cached
     
-    territories = await db.territories.find({}).to_list(1000)
+    db = request.app.state.db
     
-    # Get franchisee names
-    franchisee_ids = [t.get("currentFranchiseeId") for t in territories if t.get("currentFranchiseeId")]
-    franchisees = {}
-    if franchisee_ids:
-        for f in await db.franchisees.find({"_id": {"$in": [ObjectId(fid) for fid in franchisee_ids]}}).to_list(100):
-            franchisees[str(f["_id"])] = f.get("operatingName")
+    # Join franchisee names server-side (one round-trip instead of N+1)
+    territories = await db.territories.aggregate([
+        {"$match": {"fsaCode": {"$gt": after}} if after else {}},
+        {"$sort": {"fsaCode": 1}},
+        {"$limit": limit},
+        *_franchisee_name_lookup("currentFranchiseeId"),
+        {"$project": TERRITORY_LIST_PROJECTION}
+    ]).to_list(limit)
     
-    return {
+    return _set_cached(cache_key, {
         "success": True,
         "data": {
-            "territories": [{
-                "fsa_code": t.get("fsaCode"),
-                "city": t.get("city"),
-                "province": t.get("province"),
-                "franchisee_id": t.get("currentFranchiseeId"),
-                "franchisee_name": franchisees.get(t.get("currentFranchiseeId")),
-                "protection_status": t.get("protectionStatus", "unassigned"),
-                "assigned_at": t.get("assignedAt")
-            } for t in territories]
+            "territories": territories,
+            "next_cursor": territories[-1]["fsa_code"] if len(territories) == limit else None
         }
-    }
+    })
 
 
-@router.patch("/territories/{fsa_code}/assign", response_model=Dict)
+@router.patch("/territories/{fsa_code}/assign")
 async def assign_territory(
     fsa_code: str,
     request: Request,
@@ -240,53 +415,58 @@ async def assign_territory(
 ):
     """Assign or reassign a territory to a franchisee"""
     db = request.app.state.db
+    now = datetime.utcnow()
     
     franchisee_id = assignment_data.get("franchisee_id")
     
+    new_franchisee_oid = parse_object_id(franchisee_id, "franchisee_id") if franchisee_id else None
+    
     # Verify franchisee exists and is activated
     if franchisee_id:
-        franchisee = await db.franchisees.find_one({"_id": ObjectId(franchisee_id)})
+        franchisee = await db.franchisees.find_one({"_id": new_franchisee_oid})
         if not franchisee:
             raise HTTPException(status_code=404, detail="Franchisee not found")
         if franchisee.get("status") != "activated":
             raise HTTPException(status_code=400, detail="Franchisee must be activated")
     
-    # Update territory
-    territory = await db.territories.find_one({"fsaCode": fsa_code})
-    
-    if territory and territory.get("currentFranchiseeId"):
-        # Log the reassignment
-        await db.territory_assignments.insert_one({
-            "_id": ObjectId(),
-            "fsaCode": fsa_code,
-            "previousFranchiseeId": territory.get("currentFranchiseeId"),
-            "newFranchiseeId": franchisee_id,
-            "reason": assignment_data.get("reason", "admin_reassignment"),
-            "assignedAt": datetime.utcnow()
-        })
-    
-    await db.territories.update_one(
+    # Update territory, getting back its previous state in the same round trip
+    territory = await db.territories.find_one_and_update(
         {"fsaCode": fsa_code},
         {
             "$set": {
                 "fsaCode": fsa_code,
                 "currentFranchiseeId": franchisee_id,
-                "assignedAt": datetime.utcnow() if franchisee_id else None,
+                "assignedAt": now if franchisee_id else None,
                 "protectionStatus": "protected" if franchisee_id else "unassigned",
                 "city": assignment_data.get("city", ""),
                 "province": assignment_data.get("province", "ON")
             }
         },
-        upsert=True
+        projection={"currentFranchiseeId": 1},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE
     )
     
+    if territory and territory.get("currentFranchiseeId"):
+        # Log the reassignment
+        await db.territory_assignments.insert_one({
+            "_id": ObjectId(),
+            "fsaCode": fsa_code,
+            "previousFranchiseeId": territory.get("currentFranchiseeId"),
+            "newFranchiseeId": franchisee_id,
+            "reason": assignment_data.get("reason", "admin_reassignment"),
+            "assignedAt": now
+        })
+    
     # Update franchisee's assigned FSAs
     if franchisee_id:
         await db.franchisees.update_one(
-            {"_id": ObjectId(franchisee_id)},
+            {"_id": new_franchisee_oid},
             {"$addToSet": {"assignedFSAs": fsa_code}}
         )
     
+    _invalidate_dashboard_cache()
+    
     return {
         "success": True,
         "message": f"Territory {fsa_code} assigned successfully"
@@ -295,12 +475,12 @@ async def assign_territory(
 
 # ==================== JOB MANAGEMENT ====================
 
-@router.get("/jobs", response_model=Dict)
+@router.get("/jobs")
 async def get_all_jobs(
     request: Request,
     status_filter: Optional[str] = None,
     fsa_filter: Optional[str] = None,
-    limit: int = 100
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE)
 ):
     """Get all jobs with filters"""
     db = request.app.state.db
@@ -311,54 +491,61 @@ async def get_all_jobs(
     if fsa_filter:
         query["fsaCode"] = fsa_filter
     
-    jobs = await db.jobs.find(query).sort("createdAt", -1).limit(limit).to_list(limit)
-    
-    return {
-        "success": True,
-        "data": {
-            "jobs": [{
-                "id": str(j["_id"]),
-                "booking_id": j.get("bookingId"),
-                "franchisee_id": j.get("franchiseeId"),
-                "customer_name": j.get("customerName"),
-                "service_name": j.get("serviceName"),
-                "address": j.get("address"),
-                "fsa_code": j.get("fsaCode"),
-                "scheduled_date": j.get("scheduledDate"),
-                "status": j.get("status"),
-                "gross_amount": j.get("grossAmount"),
-                "created_at": j.get("createdAt")
-            } for j in jobs],
-            "total": len(jobs)
-        }
-    }
+    cursor = db.jobs.aggregate([
+        {"$match": query},
+        {"$sort": {"createdAt": -1}},
+        {"$limit": limit},
+        {"$project": JOB_LIST_PROJECTION}
+    ], batchSize=STREAM_BATCH_SIZE)
+    
+    # Read the first batch before committing to a 200, so a failing query
+    # (bad filter, Mongo unavailable) still surfaces as a normal error response
+    first = await cursor.to_list(STREAM_BATCH_SIZE)
+    rest = cursor if len(first) == STREAM_BATCH_SIZE else None
+    return StreamingResponse(_stream_jobs(first, rest), media_type="application/json")
+
 
+async def _stream_jobs(first: List[Dict], rest) -> AsyncIterator[bytes]:
+    """Serialize job rows as they arrive from the cursor instead of buffering the list.
+    Emits the same body as {"success": true, "data": {"jobs": [...], "total": n}}."""
+    yield b'{"success":true,"data":{"jobs":['
+    total = len(first)
+    if first:
+        yield b",".join(orjson.dumps(job, default=str) for job in first)
+    if rest is not None:
+        chunk = []
+        async for job in rest:
+            chunk.append(orjson.dumps(job, default=str))
+            if len(chunk) == STREAM_BATCH_SIZE:
+                yield b"," + b",".join(chunk)
+                total += len(chunk)
+                chunk = []
+        if chunk:
+            yield b"," + b",".join(chunk)
+            total += len(chunk)
+    yield b'],"total":%d}}' % total
 
-@router.post("/jobs/{job_id}/reassign", response_model=Dict)
-async def reassign_job(job_id: str, request: Request, reassign_data: dict):
+
+@router.post("/jobs/{job_id}/reassign")
+async def reassign_job(
+    job_id: str,
+    request: Request,
+    reassign_data: dict,
+    oid: ObjectId = Depends(job_oid)
+):
     """Reassign a job to a different franchisee"""
     db = request.app.state.db
     
     new_franchisee_id = reassign_data.get("franchisee_id")
     
     # Verify franchisee
-    franchisee = await db.franchisees.find_one({"_id": ObjectId(new_franchisee_id)})
+    franchisee = await db.franchisees.find_one({"_id": parse_object_id(new_franchisee_id, "franchisee_id")})
     if not franchisee or franchisee.get("status") != "activated":
         raise HTTPException(status_code=400, detail="Invalid or inactive franchisee")
     
-    job = await db.jobs.find_one({"_id": ObjectId(job_id)})
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-    
-    # Cancel existing work order if any
-    if job.get("workOrderId"):
-        from utils.hrbank_webhook import get_hrbank_service
-        hrbank = get_hrbank_service(db)
-        await hrbank.cancel_work_order(job_id, "Reassigned by admin")
-    
-    # Update job
-    await db.jobs.update_one(
-        {"_id": ObjectId(job_id)},
+    # Update job, getting back its previous work order in the same round trip
+    job = await db.jobs.find_one_and_update(
+        {"_id": oid},
         {
             "$set": {
                 "franchiseeId": new_franchisee_id,
@@ -367,8 +554,19 @@ async def reassign_job(job_id: str, request: Request, reassign_data: dict):
                 "reassignedBy": reassign_data.get("admin_id", "admin"),
                 "reassignReason": reassign_data.get("reason")
             }
-        }
+        },
+        projection={"workOrderId": 1},
+        return_document=ReturnDocument.BEFORE
     )
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    # Cancel existing work order if any
+    if job.get("workOrderId"):
+        hrbank = get_hrbank_service(db)
+        await hrbank.cancel_work_order(job_id, "Reassigned by admin")
+    
+    _invalidate_dashboard_cache()
     
     return {
         "success": True,
@@ -378,48 +576,45 @@ async def reassign_job(job_id: str, request: Request, reassign_data: dict):
 
 # ==================== SETTLEMENTS ====================
 
-@router.get("/settlements", response_model=Dict)
-async def get_all_settlements(request: Request, status_filter: Optional[str] = None):
+@router.get("/settlements")
+async def get_all_settlements(
+    request: Request,
+    status_filter: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None
+):
     """Get all settlement statements"""
     db = request.app.state.db
     
     query = {}
     if status_filter:
         query["payoutStatus"] = status_filter
+    query.update(await _resume_after(db.settlement_statements, after, "periodEnd"))
     
-    settlements = await db.settlement_statements.find(query).sort("periodEnd", -1).to_list(100)
-    
-    # Get franchisee names
-    franchisee_ids = list(set([s.get("franchiseeId") for s in settlements]))
-    franchisees = {}
-    for f in await db.franchisees.find({"_id": {"$in": [ObjectId(fid) for fid in franchisee_ids if fid]}}).to_list(100):
-        franchisees[str(f["_id"])] = f.get("operatingName")
+    settlements = await db.settlement_statements.aggregate([
+        {"$match": query},
+        {"$sort": {"periodEnd": -1, "_id": -1}},
+        {"$limit": limit},
+        *_franchisee_name_lookup("franchiseeId"),
+        {"$project": SETTLEMENT_LIST_PROJECTION}
+    ]).to_list(limit)
     
     return {
         "success": True,
         "data": {
-            "settlements": [{
-                "id": str(s["_id"]),
-                "franchisee_id": s.get("franchiseeId"),
-                "franchisee_name": franchisees.get(s.get("franchiseeId")),
-                "period_start": s.get("periodStart"),
-                "period_end": s.get("periodEnd"),
-                "job_count": s.get("jobCount"),
-                "gross_revenue": s.get("grossRevenue"),
-                "net_payout": s.get("netPayout"),
-                "payout_status": s.get("payoutStatus")
-            } for s in settlements]
+            "settlements": settlements,
+            "next_cursor": settlements[-1]["id"] if len(settlements) == limit else None
         }
     }
 
 
-@router.post("/settlements/{settlement_id}/approve", response_model=Dict)
-async def approve_settlement(settlement_id: str, request: Request):
+@router.post("/settlements/{settlement_id}/approve")
+async def approve_settlement(request: Request, oid: ObjectId = Depends(settlement_oid)):
     """Approve a settlement for payout"""
     db = request.app.state.db
     
     await db.settlement_statements.update_one(
-        {"_id": ObjectId(settlement_id)},
+        {"_id": oid},
         {
             "$set": {
                 "payoutStatus": "processing",
@@ -436,34 +631,86 @@ async def approve_settlement(settlement_id: str, request: Request):
 
 # ==================== REPORTING ====================
 
-@router.get("/stats", response_model=Dict)
+@router.get("/stats")
 async def get_platform_stats(request: Request):
     """Get platform-wide statistics"""
+    cached = _get_cached("stats")
+    if cached:
+        return cached
+    
     db = request.app.state.db
     
     now = datetime.utcnow()
     start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     
-    # Counts
-    total_franchisees = await db.franchisees.count_documents({"status": "activated"})
-    total_customers = await db.users.count_documents({"role": "customer"})
-    total_jobs = await db.jobs.count_documents({})
-    jobs_this_month = await db.jobs.count_documents({"createdAt": {"$gte": start_of_month}})
+    in_progress_statuses = ["accepted", "scheduled", "en_route", "in_progress"]
+    
+    # All job counters and revenue in one pass over the jobs that can match any of them
+    jobs_pipeline = [
+        {"$match": {"$or": [
+            {"createdAt": {"$gte": start_of_month}},
+            {"status": {"$in": ["pending_assignment", *in_progress_statuses]}}
+        ]}},
+        {"$facet": {
+            "this_month": [
+                {"$match": {"createdAt": {"$gte": start_of_month}}},
+                {"$count": "n"}
+            ],
+            "pending": [
+                {"$match": {"status": "pending_assignment"}},
+                {"$count": "n"}
+            ],
+            "in_progress": [
+                {"$match": {"status": {"$in": in_progress_statuses}}},
+                {"$count": "n"}
+            ],
+            "revenue": [
+                {"$match": {"status": "qa_approved", "createdAt": {"$gte": start_of_month}}},
+                {"$group": {"_id": None, "n": {"$sum": "$grossAmount"}}}
+            ]
+        }}
+    ]
     
-    # Revenue
-    pipeline = [
-        {"$match": {"status": "qa_approved", "createdAt": {"$gte": start_of_month}}},
-        {"$group": {"_id": None, "total": {"$sum": "$grossAmount"}}}
+    # Franchisee counters grouped by status in one query
+    franchisees_pipeline = [
+        {"$match": {"status": {"$in": ["activated", "submitted", "under_review"]}}},
+        {"$group": {"_id": "$status", "n": {"$sum": 1}}}
     ]
-    revenue_result = await db.jobs.aggregate(pipeline).to_list(1)
-    revenue_this_month = revenue_result[0]["total"] if revenue_result else 0
     
-    return {
+    # Independent queries, issued concurrently
+    (
+        jobs_result,
+        franchisee_counts,
+        total_customers,
+        total_jobs,
+        total_territories,
+        assigned_territories
+    ) = await asyncio.gather(
+        db.jobs.aggregate(jobs_pipeline).to_list(1),
+        db.franchisees.aggregate(franchisees_pipeline).to_list(None),
+        db.users.count_documents({"role": "customer"}),
+        # Totals come from collection metadata; dashboard counters don't need exact figures
+        db.jobs.estimated_document_count(),
+        db.territories.estimated_document_count(),
+        db.territories.count_documents({"currentFranchiseeId": {"$ne": None}})
+    )
+    
+    job_counts = {k: v[0]["n"] if v else 0 for k, v in jobs_result[0].items()}
+    jobs_this_month = job_counts["this_month"]
+    pending_jobs = job_counts["pending"]
+    in_progress_jobs = job_counts["in_progress"]
+    revenue_this_month = job_counts["revenue"]
+    
+    by_status = {c["_id"]: c["n"] for c in franchisee_counts}
+    total_franchisees = by_status.get("activated", 0)
+    pending_applications = by_status.get("submitted", 0) + by_status.get("under_review", 0)
+    
+    return _set_cached("stats", {
         "success": True,
         "data": {
             "franchisees": {
                 "active": total_franchisees,
-                "pending_applications": await db.franchisees.count_documents({"status": {"$in": ["submitted", "under_review"]}})
+                "pending_applications": pending_applications
             },
             "customers": {
                 "total": total_customers
@@ -471,15 +718,15 @@ async def get_platform_stats(request: Request):
             "jobs": {
                 "total": total_jobs,
                 "this_month": jobs_this_month,
-                "pending": await db.jobs.count_documents({"status": "pending_assignment"}),
-                "in_progress": await db.jobs.count_documents({"status": {"$in": ["accepted", "scheduled", "en_route", "in_progress"]}})
+                "pending": pending_jobs,
+                "in_progress": in_progress_jobs
             },
             "revenue": {
                 "this_month": revenue_this_month
             },
             "territories": {
-                "total": await db.territories.count_documents({}),
-                "assigned": await db.territories.count_documents({"currentFranchiseeId": {"$ne": None}})
+                "total": total_territories,
+                "assigned": assigned_territories
             }
         }
-    }
+    })
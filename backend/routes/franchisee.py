@@ -1,42 +1,163 @@
 """Franchisee Routes for CleanGrid"""
 from fastapi import APIRouter, HTTPException, Depends, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import ORJSONResponse
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
+from collections import OrderedDict
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from utils.audit import log_audit
+from utils.hrbank_webhook import get_hrbank_service
+from utils.ids import application_oid, job_oid
+from utils.projections import project_field
 from jose import JWTError, jwt
+import asyncio
+import copy
 import os
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/franchisee", tags=["Franchisee"])
+router = APIRouter(prefix="/franchisee", tags=["Franchisee"], default_response_class=ORJSONResponse)
 
 # Security
 security = HTTPBearer()
 SECRET_KEY = os.environ.get("SECRET_KEY", "neatify-secret-key-change-in-production")
 ALGORITHM = "HS256"
 
+# Application fields that must be present and non-empty, in reporting order
+REQUIRED_APPLICATION_FIELDS = (
+    "legalName", "legalType", "operatingName", "contactName",
+    "email", "phone", "address", "city", "province", "postalCode"
+)
+
+# Projections: only the fields each handler reads
+DASHBOARD_FRANCHISEE_FIELDS = {
+    "ownerId": 1, "operatingName": 1, "legalName": 1, "contactName": 1,
+    "email": 1, "city": 1, "province": 1, "status": 1, "assignedFSAs": 1,
+    "preferredFSAs": 1, "kpiScore": 1, "acceptanceRate": 1, "completionRate": 1,
+    "avgRating": 1, "hrbankEmployerId": 1
+}
+FRANCHISEE_JOB_PROJECTION = {
+    "_id": 0,
+    "id": {"$toString": "$_id"},
+    "booking_id": project_field("bookingId"),
+    "customer_name": project_field("customerName"),
+    "service_name": project_field("serviceName"),
+    "address": project_field("address"),
+    "fsa_code": project_field("fsaCode"),
+    "scheduled_date": project_field("scheduledDate"),
+    "time_window": {"$concat": [project_field("timeWindowStart", ""), " - ", project_field("timeWindowEnd", "")]},
+    "status": project_field("status"),
+    "gross_amount": project_field("grossAmount"),
+    "net_to_franchisee": project_field("netToFranchisee")
+}
+FRANCHISEE_SETTLEMENT_PROJECTION = {
+    "_id": 0,
+    "id": {"$toString": "$_id"},
+    "period_start": project_field("periodStart"),
+    "period_end": project_field("periodEnd"),
+    "job_count": project_field("jobCount", 0),
+    "gross_revenue": project_field("grossRevenue", 0),
+    "platform_fees": project_field("platformFees", 0),
+    "adjustments_total": project_field("adjustmentsTotal", 0),
+    "net_payout": project_field("netPayout", 0),
+    "payout_status": project_field("payoutStatus", "pending"),
+    "paid_at": project_field("paidAt")
+}
+COMPLIANCE_DOC_PROJECTION = {
+    "_id": 0,
+    "id": {"$toString": "$_id"},
+    "doc_type": project_field("docType"),
+    "file_name": project_field("fileName"),
+    "status": project_field("status"),
+    "expires_at": project_field("expiresAt"),
+    "uploaded_at": project_field("uploadedAt")
+}
+
+# Verified token -> (cache expiry as unix time, user doc), in LRU order.
+# Entries never outlive the token's exp; the short TTL bounds how stale the user doc can get,
+# and user mutations drop the user's entries through invalidate_user.
+AUTH_CACHE_TTL = 60
+AUTH_CACHE_SIZE = 1024
+_auth_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+def _get_cached_user(token: str) -> Optional[dict]:
+    entry = _auth_cache.get(token)
+    if entry is None:
+        return None
+    expires_at, user = entry
+    if time.time() >= expires_at:
+        del _auth_cache[token]
+        return None
+    _auth_cache.move_to_end(token)
+    # Callers get their own copy, so mutating it can't corrupt the cache
+    return copy.deepcopy(user)
+
+
+def _cache_user(token: str, user: dict, token_exp: Optional[float]) -> None:
+    expires_at = time.time() + AUTH_CACHE_TTL
+    if token_exp is not None:
+        expires_at = min(expires_at, token_exp)
+    _auth_cache[token] = (expires_at, copy.deepcopy(user))
+    if len(_auth_cache) > AUTH_CACHE_SIZE:
+        _auth_cache.popitem(last=False)
+
+
+def invalidate_user(user_id) -> None:
+    """Drop cached auth entries for a user whose role, status or profile changed"""
+    user_id = str(user_id)
+    for token in [t for t, (_, user) in _auth_cache.items() if str(user["_id"]) == user_id]:
+        del _auth_cache[token]
+
+
 async def get_current_user_from_token(credentials: HTTPAuthorizationCredentials, db):
     """Extract and verify user from JWT token"""
     token = credentials.credentials
+    user = _get_cached_user(token)
+    if user is not None:
+        return user
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
+        user_oid = ObjectId(user_id)
+    except (JWTError, InvalidId, TypeError):
         raise HTTPException(status_code=401, detail="Invalid token")
     
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    user = await db.users.find_one({"_id": user_oid})
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
     
+    _cache_user(token, user, payload.get("exp"))
     return user
 
+
+async def _get_franchisee(db, user, fields: Optional[Dict] = None) -> Optional[dict]:
+    """Get the user's franchisee in one query: the one they own, else the one
+    applied for with their email (accounts created before linking).
+    Only `_id`, `ownerId` and `fields` are fetched."""
+    owner_id = str(user["_id"])
+    # The owned franchisee ranks first even if legacy duplicates share the email
+    candidates = await db.franchisees.aggregate([
+        {"$match": {"$or": [{"ownerId": owner_id}, {"email": user.get("email")}]}},
+        {"$addFields": {"_owned": {"$eq": ["$ownerId", owner_id]}}},
+        {"$sort": {"_owned": -1, "_id": 1}},
+        {"$limit": 1},
+        {"$project": {**(fields or {}), "ownerId": 1}}
+    ]).to_list(1)
+    return candidates[0] if candidates else None
+
 # ==================== APPLICATION ENDPOINTS ====================
 
-@router.post("/apply", response_model=Dict)
+@router.post("/apply")
 async def submit_application(application_data: dict, request: Request):
     """
     Submit a franchisee application.
@@ -44,21 +165,16 @@ async def submit_application(application_data: dict, request: Request):
     """
     db = request.app.state.db
     
-    # Validate required fields
-    required_fields = [
-        "legalName", "legalType", "operatingName", "contactName",
-        "email", "phone", "address", "city", "province", "postalCode"
-    ]
-    
-    for field in required_fields:
-        if not application_data.get(field):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Missing required field: {field}"
-            )
+    # Validate required fields, reporting every missing one at once
+    missing = [field for field in REQUIRED_APPLICATION_FIELDS if not application_data.get(field)]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Missing required field{'s' if len(missing) > 1 else ''}: {', '.join(missing)}"
+        )
     
     # Check if email already has an application
-    existing = await db.franchisees.find_one({"email": application_data["email"]})
+    existing = await db.franchisees.find_one({"email": application_data["email"]}, {"_id": 1})
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -66,6 +182,7 @@ async def submit_application(application_data: dict, request: Request):
         )
     
     # Create franchisee record
+    now = datetime.utcnow()
     franchisee_doc = {
         "_id": ObjectId(),
         "ownerId": None,  # Will be set when user account is created
@@ -116,14 +233,21 @@ async def submit_application(application_data: dict, request: Request):
         "avgRating": 5.0,
         
         # Timestamps
-        "applicationSubmittedAt": datetime.utcnow(),
-        "createdAt": datetime.utcnow()
+        "applicationSubmittedAt": now,
+        "createdAt": now
     }
     
-    await db.franchisees.insert_one(franchisee_doc)
+    try:
+        await db.franchisees.insert_one(franchisee_doc)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent submission for the same email
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="An application with this email already exists"
+        )
     
-    # Create audit log
-    await db.audit_logs.insert_one({
+    # Create audit log (written in the next batch, off the request path)
+    log_audit({
         "_id": ObjectId(),
         "actorId": "public",
         "actorRole": "applicant",
@@ -131,7 +255,7 @@ async def submit_application(application_data: dict, request: Request):
         "resourceType": "franchisee",
         "resourceId": str(franchisee_doc["_id"]),
         "changes": {"status": "submitted"},
-        "createdAt": datetime.utcnow()
+        "createdAt": now
     })
     
     return {
@@ -144,12 +268,15 @@ async def submit_application(application_data: dict, request: Request):
     }
 
 
-@router.get("/application/{application_id}", response_model=Dict)
-async def get_application_status(application_id: str, request: Request):
+@router.get("/application/{application_id}")
+async def get_application_status(application_id: str, request: Request, oid: ObjectId = Depends(application_oid)):
     """Get application status (public with application ID)"""
     db = request.app.state.db
     
-    franchisee = await db.franchisees.find_one({"_id": ObjectId(application_id)})
+    franchisee = await db.franchisees.find_one(
+        {"_id": oid},
+        {"operatingName": 1, "status": 1, "applicationSubmittedAt": 1, "assignedFSAs": 1}
+    )
     if not franchisee:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -170,7 +297,7 @@ async def get_application_status(application_id: str, request: Request):
 
 # ==================== AUTHENTICATED FRANCHISEE ENDPOINTS ====================
 
-@router.get("/dashboard", response_model=Dict)
+@router.get("/dashboard")
 async def get_dashboard(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """
     Get franchisee dashboard with KPIs and territory info.
@@ -181,23 +308,21 @@ async def get_dashboard(request: Request, credentials: HTTPAuthorizationCredenti
     # Get user from token
     user = await get_current_user_from_token(credentials, db)
     
-    # Get franchisee - try by ownerId first, then by email
-    franchisee = await db.franchisees.find_one({"ownerId": str(user["_id"])})
-    if not franchisee:
-        # Try to find by email (for users who applied before account linking)
-        franchisee = await db.franchisees.find_one({"email": user.get("email")})
-        
-        # If found by email, link the user account to this franchisee
-        if franchisee and not franchisee.get("ownerId"):
-            await db.franchisees.update_one(
-                {"_id": franchisee["_id"]},
-                {"$set": {"ownerId": str(user["_id"])}}
-            )
-            # Also update user with franchisee role and ID
-            await db.users.update_one(
-                {"_id": user["_id"]},
-                {"$set": {"role": "franchisee_owner", "franchiseeId": str(franchisee["_id"])}}
-            )
+    # Get franchisee - by ownerId, else by email
+    franchisee = await _get_franchisee(db, user, DASHBOARD_FRANCHISEE_FIELDS)
+    
+    # If found by email (applied before account linking), link the user account to this franchisee
+    if franchisee and not franchisee.get("ownerId"):
+        await db.franchisees.update_one(
+            {"_id": franchisee["_id"]},
+            {"$set": {"ownerId": str(user["_id"])}}
+        )
+        # Also update user with franchisee role and ID
+        await db.users.update_one(
+            {"_id": user["_id"]},
+            {"$set": {"role": "franchisee_owner", "franchiseeId": str(franchisee["_id"])}}
+        )
+        invalidate_user(user["_id"])
     
     if not franchisee:
         raise HTTPException(
@@ -205,14 +330,65 @@ async def get_dashboard(request: Request, credentials: HTTPAuthorizationCredenti
             detail="Franchisee profile not found"
         )
     
-    # Get territory info (from assigned FSAs or territories collection)
+    franchisee_id = str(franchisee["_id"])
     assigned_fsas = franchisee.get("assignedFSAs", [])
+    now = datetime.utcnow()
+    start_of_week = now - timedelta(days=now.weekday())
+    
+    # All three job counters in one pass over the franchisee's jobs
+    job_stats_pipeline = [
+        {"$match": {"franchiseeId": franchisee_id}},
+        {"$group": {
+            "_id": None,
+            "jobs_this_week": {"$sum": {"$cond": [{"$gte": ["$createdAt", start_of_week]}, 1, 0]}},
+            "pending_jobs": {"$sum": {"$cond": [{"$in": ["$status", ["pending_assignment", "assigned"]]}, 1, 0]}},
+            "completed_jobs": {"$sum": {"$cond": [{"$eq": ["$status", "qa_approved"]}, 1, 0]}}
+        }}
+    ]
+    
+    # Effective status per document type, computed in Mongo. Among the first
+    # 10 documents, the last verified/pending one of each type wins.
+    compliance_pipeline = [
+        {"$match": {"franchiseeId": franchisee_id}},
+        {"$limit": 10},
+        {"$match": {"status": {"$in": ["verified", "pending"]}}},
+        {"$group": {
+            "_id": "$docType",
+            "status": {"$last": {"$cond": [
+                {"$eq": ["$status", "pending"]},
+                "pending",
+                {"$cond": [
+                    {"$and": [{"$ifNull": ["$expiresAt", False]}, {"$lt": ["$expiresAt", now]}]},
+                    "expired",
+                    "verified"
+                ]}
+            ]}}
+        }}
+    ]
+    
+    (
+        assigned_territories,
+        job_stats,
+        compliance_docs
+    ) = await asyncio.gather(
+        db.territories.find(
+            {"fsaCode": {"$in": assigned_fsas}},
+            {"fsaCode": 1, "city": 1, "protectionStatus": 1}
+        ).to_list(None)
+        if assigned_fsas else asyncio.sleep(0, result=[]),
+        db.jobs.aggregate(job_stats_pipeline).to_list(1),
+        db.compliance_documents.aggregate(compliance_pipeline).to_list(None)
+    )
+    job_stats = job_stats[0] if job_stats else {}
+    
+    # Get territory info (from assigned FSAs or territories collection)
     territories_data = []
     
     # If we have assigned FSAs, use those
     if assigned_fsas:
+        territories_by_fsa = {t.get("fsaCode"): t for t in assigned_territories}
         for fsa_code in assigned_fsas:
-            territory = await db.territories.find_one({"fsaCode": fsa_code})
+            territory = territories_by_fsa.get(fsa_code)
             if territory:
                 territories_data.append({
                     "fsa_code": fsa_code,
@@ -236,46 +412,14 @@ async def get_dashboard(request: Request, credentials: HTTPAuthorizationCredenti
                 "protection_status": "pending"
             })
     
-    # Get job stats
-    now = datetime.utcnow()
-    start_of_week = now - timedelta(days=now.weekday())
-    
-    jobs_this_week = await db.jobs.count_documents({
-        "franchiseeId": str(franchisee["_id"]),
-        "createdAt": {"$gte": start_of_week}
-    })
-    
-    pending_jobs = await db.jobs.count_documents({
-        "franchiseeId": str(franchisee["_id"]),
-        "status": {"$in": ["pending_assignment", "assigned"]}
-    })
-    
-    completed_jobs = await db.jobs.count_documents({
-        "franchiseeId": str(franchisee["_id"]),
-        "status": "qa_approved"
-    })
-    
     # Get compliance status
-    compliance_docs = await db.compliance_documents.find({
-        "franchiseeId": str(franchisee["_id"])
-    }).to_list(10)
-    
     compliance_status = {
         "cgl_insurance": "missing",
         "auto_insurance": "missing",
-        "wsib": "missing"
+        "wsib": "missing",
+        **{doc["_id"]: doc["status"] for doc in compliance_docs}
     }
     
-    for doc in compliance_docs:
-        doc_type = doc.get("docType")
-        if doc.get("status") == "verified":
-            if doc.get("expiresAt") and doc["expiresAt"] < now:
-                compliance_status[doc_type] = "expired"
-            else:
-                compliance_status[doc_type] = "verified"
-        elif doc.get("status") == "pending":
-            compliance_status[doc_type] = "pending"
-    
     return {
         "success": True,
         "data": {
@@ -297,9 +441,9 @@ async def get_dashboard(request: Request, credentials: HTTPAuthorizationCredenti
             },
             "territories": territories_data,
             "stats": {
-                "jobs_this_week": jobs_this_week,
-                "pending_jobs": pending_jobs,
-                "completed_jobs": completed_jobs
+                "jobs_this_week": job_stats.get("jobs_this_week", 0),
+                "pending_jobs": job_stats.get("pending_jobs", 0),
+                "completed_jobs": job_stats.get("completed_jobs", 0)
             },
             "compliance": compliance_status,
             "hrbank_configured": bool(franchisee.get("hrbankEmployerId"))
@@ -307,15 +451,13 @@ async def get_dashboard(request: Request, credentials: HTTPAuthorizationCredenti
     }
 
 
-@router.get("/jobs", response_model=Dict)
+@router.get("/jobs")
 async def get_jobs(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security), status_filter: Optional[str] = None, limit: int = 50):
     """Get franchisee's jobs"""
     db = request.app.state.db
     user = await get_current_user_from_token(credentials, db)
     
-    franchisee = await db.franchisees.find_one({"ownerId": str(user["_id"])})
-    if not franchisee:
-        franchisee = await db.franchisees.find_one({"email": user.get("email")})
+    franchisee = await _get_franchisee(db, user)
     if not franchisee:
         raise HTTPException(status_code=404, detail="Franchisee not found")
     
@@ -323,67 +465,60 @@ async def get_jobs(request: Request, credentials: HTTPAuthorizationCredentials =
     if status_filter:
         query["status"] = status_filter
     
-    jobs = await db.jobs.find(query).sort("scheduledDate", 1).limit(limit).to_list(limit)
+    jobs = await db.jobs.aggregate([
+        {"$match": query},
+        {"$sort": {"scheduledDate": 1}},
+        {"$limit": limit},
+        {"$project": FRANCHISEE_JOB_PROJECTION}
+    ]).to_list(limit)
     
     return {
         "success": True,
         "data": {
-            "jobs": [{
-                "id": str(j["_id"]),
-                "booking_id": j.get("bookingId"),
-                "customer_name": j.get("customerName"),
-                "service_name": j.get("serviceName"),
-                "address": j.get("address"),
-                "fsa_code": j.get("fsaCode"),
-                "scheduled_date": j.get("scheduledDate"),
-                "time_window": f"{j.get('timeWindowStart', '')} - {j.get('timeWindowEnd', '')}",
-                "status": j.get("status"),
-                "gross_amount": j.get("grossAmount"),
-                "net_to_franchisee": j.get("netToFranchisee")
-            } for j in jobs]
+            "jobs": jobs
         }
     }
 
 
-@router.post("/jobs/{job_id}/accept", response_model=Dict)
-async def accept_job(job_id: str, request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
+@router.post("/jobs/{job_id}/accept")
+async def accept_job(
+    job_id: str,
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    oid: ObjectId = Depends(job_oid)
+):
     """Accept a job - triggers work order creation to HR Bank"""
     db = request.app.state.db
     user = await get_current_user_from_token(credentials, db)
     
-    franchisee = await db.franchisees.find_one({"ownerId": str(user["_id"])})
-    if not franchisee:
-        franchisee = await db.franchisees.find_one({"email": user.get("email")})
+    franchisee = await _get_franchisee(db, user)
     if not franchisee:
         raise HTTPException(status_code=404, detail="Franchisee not found")
     
-    job = await db.jobs.find_one({
-        "_id": ObjectId(job_id),
-        "franchiseeId": str(franchisee["_id"])
-    })
-    
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-    
-    if job.get("status") not in ["pending_assignment", "assigned"]:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Cannot accept job with status: {job.get('status')}"
-        )
+    job_filter = {"_id": oid, "franchiseeId": str(franchisee["_id"])}
     
-    # Update job status
-    await db.jobs.update_one(
-        {"_id": ObjectId(job_id)},
+    # Update job status; the status precondition makes concurrent accepts safe
+    job = await db.jobs.find_one_and_update(
+        {**job_filter, "status": {"$in": ["pending_assignment", "assigned"]}},
         {
             "$set": {
                 "status": "accepted",
                 "acceptedAt": datetime.utcnow()
             }
-        }
+        },
+        projection={"_id": 1},
+        return_document=ReturnDocument.AFTER
     )
+    if not job:
+        job = await db.jobs.find_one(job_filter, {"status": 1})
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot accept job with status: {job.get('status')}"
+        )
     
     # Create work order to HR Bank
-    from utils.hrbank_webhook import get_hrbank_service
     hrbank = get_hrbank_service(db)
     work_order_result = await hrbank.create_work_order(job_id)
     
@@ -399,29 +534,25 @@ async def accept_job(job_id: str, request: Request, credentials: HTTPAuthorizati
     }
 
 
-@router.post("/jobs/{job_id}/decline", response_model=Dict)
-async def decline_job(job_id: str, request: Request, credentials: HTTPAuthorizationCredentials = Depends(security), reason: Optional[str] = None):
+@router.post("/jobs/{job_id}/decline")
+async def decline_job(
+    job_id: str,
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    reason: Optional[str] = None,
+    oid: ObjectId = Depends(job_oid)
+):
     """Decline a job - will be re-routed to another franchisee"""
     db = request.app.state.db
     user = await get_current_user_from_token(credentials, db)
     
-    franchisee = await db.franchisees.find_one({"ownerId": str(user["_id"])})
-    if not franchisee:
-        franchisee = await db.franchisees.find_one({"email": user.get("email")})
+    franchisee = await _get_franchisee(db, user)
     if not franchisee:
         raise HTTPException(status_code=404, detail="Franchisee not found")
     
-    job = await db.jobs.find_one({
-        "_id": ObjectId(job_id),
-        "franchiseeId": str(franchisee["_id"])
-    })
-    
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-    
-    # Update job for re-routing
-    await db.jobs.update_one(
-        {"_id": ObjectId(job_id)},
+    # Update job for re-routing, only while this franchisee still holds it
+    job = await db.jobs.find_one_and_update(
+        {"_id": oid, "franchiseeId": str(franchisee["_id"])},
         {
             "$set": {
                 "status": "pending_assignment",
@@ -430,9 +561,14 @@ async def decline_job(job_id: str, request: Request, credentials: HTTPAuthorizat
                 "declineReason": reason,
                 "declinedAt": datetime.utcnow()
             }
-        }
+        },
+        projection={"_id": 1},
+        return_document=ReturnDocument.AFTER
     )
     
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
     # Update franchisee KPI (affects acceptance rate)
     # This would trigger KPI recalculation in a real system
     
@@ -443,68 +579,51 @@ async def decline_job(job_id: str, request: Request, credentials: HTTPAuthorizat
     }
 
 
-@router.get("/settlements", response_model=Dict)
+@router.get("/settlements")
 async def get_settlements(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security), limit: int = 10):
     """Get franchisee settlement statements"""
     db = request.app.state.db
     user = await get_current_user_from_token(credentials, db)
     
-    franchisee = await db.franchisees.find_one({"ownerId": str(user["_id"])})
-    if not franchisee:
-        franchisee = await db.franchisees.find_one({"email": user.get("email")})
+    franchisee = await _get_franchisee(db, user)
     if not franchisee:
         raise HTTPException(status_code=404, detail="Franchisee not found")
     
-    settlements = await db.settlement_statements.find({
-        "franchiseeId": str(franchisee["_id"])
-    }).sort("periodEnd", -1).limit(limit).to_list(limit)
+    settlements = await db.settlement_statements.aggregate([
+        {"$match": {"franchiseeId": str(franchisee["_id"])}},
+        {"$sort": {"periodEnd": -1}},
+        {"$limit": limit},
+        {"$project": FRANCHISEE_SETTLEMENT_PROJECTION}
+    ]).to_list(limit)
     
     return {
         "success": True,
         "data": {
-            "settlements": [{
-                "id": str(s["_id"]),
-                "period_start": s.get("periodStart"),
-                "period_end": s.get("periodEnd"),
-                "job_count": s.get("jobCount", 0),
-                "gross_revenue": s.get("grossRevenue", 0),
-                "platform_fees": s.get("platformFees", 0),
-                "adjustments_total": s.get("adjustmentsTotal", 0),
-                "net_payout": s.get("netPayout", 0),
-                "payout_status": s.get("payoutStatus", "pending"),
-                "paid_at": s.get("paidAt")
-            } for s in settlements]
+            "settlements": settlements
         }
     }
 
 
-@router.get("/compliance", response_model=Dict)
+@router.get("/compliance")
 async def get_compliance_documents(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get compliance document status"""
     db = request.app.state.db
     user = await get_current_user_from_token(credentials, db)
     
-    franchisee = await db.franchisees.find_one({"ownerId": str(user["_id"])})
-    if not franchisee:
-        franchisee = await db.franchisees.find_one({"email": user.get("email")})
+    franchisee = await _get_franchisee(db, user)
     if not franchisee:
         raise HTTPException(status_code=404, detail="Franchisee not found")
     
-    docs = await db.compliance_documents.find({
-        "franchiseeId": str(franchisee["_id"])
-    }).to_list(20)
+    docs = await db.compliance_documents.aggregate([
+        {"$match": {"franchiseeId": str(franchisee["_id"])}},
+        {"$limit": 20},
+        {"$project": COMPLIANCE_DOC_PROJECTION}
+    ]).to_list(20)
     
     return {
         "success": True,
         "data": {
-            "documents": [{
-                "id": str(d["_id"]),
-                "doc_type": d.get("docType"),
-                "file_name": d.get("fileName"),
-                "status": d.get("status"),
-                "expires_at": d.get("expiresAt"),
-                "uploaded_at": d.get("uploadedAt")
-            } for d in docs],
+            "documents": docs,
             "required_documents": [
                 {"type": "cgl_insurance", "name": "Commercial General Liability Insurance", "min_coverage": "$2,000,000"},
                 {"type": "auto_insurance", "name": "Commercial Auto Insurance", "required_if": "vehicle_access"},
@@ -514,15 +633,13 @@ async def get_compliance_documents(request: Request, credentials: HTTPAuthorizat
     }
 
 
-@router.patch("/hrbank/configure", response_model=Dict)
+@router.patch("/hrbank/configure")
 async def configure_hrbank(request: Request, config_data: dict, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Configure HR Bank integration for franchisee"""
     db = request.app.state.db
     user = await get_current_user_from_token(credentials, db)
     
-    franchisee = await db.franchisees.find_one({"ownerId": str(user["_id"])})
-    if not franchisee:
-        franchisee = await db.franchisees.find_one({"email": user.get("email")})
+    franchisee = await _get_franchisee(db, user)
     if not franchisee:
         raise HTTPException(status_code=404, detail="Franchisee not found")
     
@@ -1,21 +1,164 @@
 """
 Stripe Payment Routes for CleanGrid
-Handles payment processing for cleaning service bookings
+Handles payment processing for cleaning service bookings.
+Stripe calls use the SDK's *_async methods so they don't tie up threadpool workers.
 """
 from fastapi import APIRouter, HTTPException, Request, Depends
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import hashlib
+import logging
+import orjson
+import random
 import stripe
 import os
+import time
+import uuid
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Initialize Stripe
+logger = logging.getLogger(__name__)
+
+# Initialize Stripe. Every call goes through the *_async methods, so use the
+# httpx client directly: one pooled AsyncClient, no requests session alongside it.
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
+stripe.default_http_client = stripe.HTTPXClient()
+# Mutating calls carry an idempotency key per request, so the SDK's own retries
+# (connection drops, 409 "idempotency key in use") reuse the key and can't
+# double-charge or double-refund.
+stripe.max_network_retries = 2
+STRIPE_PUBLISHABLE_KEY = os.getenv("STRIPE_PUBLISHABLE_KEY")
+STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
+if not STRIPE_WEBHOOK_SECRET:
+    logger.warning("STRIPE_WEBHOOK_SECRET is not set; /payments/webhook will reject all events")
+
+# The publishable key is fixed for the process lifetime, so the config
+# body is serialized once and is safe for edge caches to hold.
+_CONFIG_BODY = orjson.dumps({"publishableKey": STRIPE_PUBLISHABLE_KEY})
+_CONFIG_HEADERS = {"Cache-Control": "public, max-age=3600"}
+
+# 429s aren't retried by the SDK; _stripe_call backs off and retries them itself
+STRIPE_RATE_LIMIT_ATTEMPTS = 3
+STRIPE_RATE_LIMIT_BACKOFF = 0.2  # seconds, doubled per attempt plus jitter
+
+# Stripe's default tolerance for the signed timestamp, against replayed deliveries
+WEBHOOK_TOLERANCE_SECONDS = 300
+
+# Verified webhook events are handed to a small worker pool so the endpoint
+# answers Stripe right away; a full backlog answers 503 and Stripe retries.
+STRIPE_EVENT_QUEUE_SIZE = 1000
+STRIPE_EVENT_WORKERS = 4
+
+# Stripe sees 200 once an event is queued and won't redeliver it, so events
+# whose handler fails (or that are still queued at shutdown) are stored with
+# their payload in stripe_event_retries and re-applied with backoff.
+STRIPE_EVENT_RETRY_INTERVAL = 30  # seconds between retry passes
+STRIPE_EVENT_RETRY_DELAY = 60  # seconds before the first retry, doubled per failed attempt
+STRIPE_EVENT_RETRY_LEASE = 300  # seconds a claimed retry is hidden from other passes
+STRIPE_EVENT_MAX_ATTEMPTS = 8  # then kept in the collection for manual replay
+
+_event_queue: "asyncio.Queue" = asyncio.Queue(maxsize=STRIPE_EVENT_QUEUE_SIZE)
+_event_workers: List[asyncio.Task] = []
+
+# In-process cache for get_payment_intent, which the booking UI polls:
+# intent id -> (stored_at, response). Captures, cancels and payment_intent
+# webhooks drop the entry; the TTL bounds staleness across processes.
+PAYMENT_INTENT_CACHE_TTL = 60
+PAYMENT_INTENT_CACHE_SIZE = 1024
+_payment_intent_cache: Dict[str, tuple] = {}
+# Retrievals in flight, so concurrent cold polls for one intent share a Stripe call
+_intent_fetches: Dict[str, asyncio.Future] = {}
+# intent id -> [generation, retrievals in flight]. Invalidation bumps the generation,
+# and a retrieval only caches its result if the generation it started under still holds.
+# Entries live only while a retrieval for the id is in flight.
+_intent_generations: Dict[str, list] = {}
+
+
+def _get_cached_intent(payment_intent_id: str) -> Optional[Dict]:
+    entry = _payment_intent_cache.get(payment_intent_id)
+    if entry and time.monotonic() - entry[0] < PAYMENT_INTENT_CACHE_TTL:
+        return entry[1]
+    return None
+
+
+def _cache_intent(payment_intent_id: str, response: Dict) -> Dict:
+    _payment_intent_cache.pop(payment_intent_id, None)
+    if len(_payment_intent_cache) >= PAYMENT_INTENT_CACHE_SIZE:
+        # Oldest insertion first
+        _payment_intent_cache.pop(next(iter(_payment_intent_cache)))
+    _payment_intent_cache[payment_intent_id] = (time.monotonic(), response)
+    return response
+
+
+def _invalidate_intent(payment_intent_id: Optional[str]) -> None:
+    if not payment_intent_id:
+        return
+    _payment_intent_cache.pop(payment_intent_id, None)
+    state = _intent_generations.get(payment_intent_id)
+    if state:
+        state[0] += 1
+    # Later polls start a fresh retrieval instead of joining one that began before the change
+    _intent_fetches.pop(payment_intent_id, None)
+
 
-router = APIRouter(prefix="/payments", tags=["payments"])
+async def _fetch_intent(payment_intent_id: str) -> Dict:
+    state = _intent_generations.setdefault(payment_intent_id, [0, 0])
+    generation = state[0]
+    state[1] += 1
+    try:
+        payment_intent = await _stripe_call(stripe.PaymentIntent.retrieve_async, payment_intent_id)
+        response = {
+            "id": payment_intent.id,
+            "amount": payment_intent.amount,
+            "currency": payment_intent.currency,
+            "status": payment_intent.status,
+            "metadata": payment_intent.metadata,
+            "created": payment_intent.created
+        }
+        if state[0] == generation:
+            _cache_intent(payment_intent_id, response)
+        return response
+    finally:
+        state[1] -= 1
+        if not state[1]:
+            _intent_generations.pop(payment_intent_id, None)
+
+
+def _forget_fetch(payment_intent_id: str, fetch: asyncio.Future) -> None:
+    if _intent_fetches.get(payment_intent_id) is fetch:
+        del _intent_fetches[payment_intent_id]
+
+
+async def _retrieve_intent(payment_intent_id: str) -> Dict:
+    fetch = _intent_fetches.get(payment_intent_id)
+    if fetch is None:
+        fetch = asyncio.ensure_future(_fetch_intent(payment_intent_id))
+        _intent_fetches[payment_intent_id] = fetch
+        fetch.add_done_callback(lambda done: _forget_fetch(payment_intent_id, done))
+    # Shielded so one disconnecting poller doesn't cancel the fetch for the others
+    return await asyncio.shield(fetch)
+
+
+router = APIRouter(prefix="/payments", tags=["payments"], default_response_class=ORJSONResponse)
+
+
+async def _stripe_call(fn, *args, **kwargs):
+    """Await a Stripe *_async call, retrying rate-limited requests with jittered
+    exponential backoff. kwargs (including idempotency_key) are reused as-is, so
+    a retried write dedupes on Stripe's side."""
+    for attempt in range(STRIPE_RATE_LIMIT_ATTEMPTS):
+        try:
+            return await fn(*args, **kwargs)
+        except stripe.error.RateLimitError:
+            if attempt == STRIPE_RATE_LIMIT_ATTEMPTS - 1:
+                raise
+            await asyncio.sleep(STRIPE_RATE_LIMIT_BACKOFF * 2 ** attempt + random.random() * 0.1)
 
 
 class CreatePaymentIntentRequest(BaseModel):
@@ -25,6 +168,7 @@ class CreatePaymentIntentRequest(BaseModel):
     customer_name: str
     service_name: str
     metadata: Optional[dict] = None
+    attempt_id: Optional[str] = None  # new value per checkout attempt, e.g. after a cancelled intent
 
 
 class ConfirmPaymentRequest(BaseModel):
@@ -35,31 +179,41 @@ class ConfirmPaymentRequest(BaseModel):
 @router.get("/config")
 def get_stripe_config():
     """Return publishable key for frontend"""
-    return {
-        "publishableKey": os.getenv("STRIPE_PUBLISHABLE_KEY")
-    }
+    return Response(content=_CONFIG_BODY, media_type="application/json", headers=_CONFIG_HEADERS)
 
 
 @router.post("/create-payment-intent")
-def create_payment_intent(request: CreatePaymentIntentRequest):
+async def create_payment_intent(request: CreatePaymentIntentRequest):
     """
     Create a Stripe PaymentIntent with manual capture.
     This holds the payment until the job is completed.
     """
+    params = {
+        "amount": request.amount,
+        "currency": "cad",
+        "capture_method": "manual",  # Hold payment, don't charge immediately
+        "metadata": {
+            "booking_id": request.booking_id,
+            "customer_email": request.customer_email,
+            "service_name": request.service_name,
+            **(request.metadata or {})
+        },
+        "description": f"CleanGrid Booking - {request.service_name}",
+        "receipt_email": request.customer_email,
+    }
+    # Stripe replays (or rejects, if parameters differ) a reused key for 24h, so the
+    # key covers every parameter plus the client's attempt id: a retried request
+    # dedupes, while a changed or fresh checkout gets its own intent.
+    params_hash = hashlib.sha256(
+        orjson.dumps([params, request.attempt_id], option=orjson.OPT_SORT_KEYS)
+    ).hexdigest()
+    
     try:
         # Create payment intent with manual capture (hold until job complete)
-        payment_intent = stripe.PaymentIntent.create(
-            amount=request.amount,
-            currency="cad",
-            capture_method="manual",  # Hold payment, don't charge immediately
-            metadata={
-                "booking_id": request.booking_id,
-                "customer_email": request.customer_email,
-                "service_name": request.service_name,
-                **(request.metadata or {})
-            },
-            description=f"CleanGrid Booking - {request.service_name}",
-            receipt_email=request.customer_email,
+        payment_intent = await _stripe_call(
+            stripe.PaymentIntent.create_async,
+            **params,
+            idempotency_key=f"pi:{request.booking_id}:{params_hash}",
         )
         
         return {
@@ -84,23 +238,19 @@ def create_payment_intent(request: CreatePaymentIntentRequest):
 
 
 @router.post("/capture/{payment_intent_id}")
-def capture_payment(payment_intent_id: str):
+async def capture_payment(payment_intent_id: str):
     """
     Capture a previously authorized payment after job completion.
     Called when franchisee completes the job.
     """
     try:
-        # Retrieve the payment intent
-        payment_intent = stripe.PaymentIntent.retrieve(payment_intent_id)
-        
-        if payment_intent.status != "requires_capture":
-            raise HTTPException(
-                status_code=400,
-                detail=f"Payment cannot be captured. Current status: {payment_intent.status}"
-            )
-        
-        # Capture the payment
-        captured = stripe.PaymentIntent.capture(payment_intent_id)
+        # Capture the payment; Stripe rejects intents not in requires_capture
+        captured = await _stripe_call(
+            stripe.PaymentIntent.capture_async,
+            payment_intent_id,
+            idempotency_key=f"capture:{payment_intent_id}:{uuid.uuid4()}"
+        )
+        _invalidate_intent(payment_intent_id)
         
         return {
             "success": True,
@@ -116,20 +266,23 @@ def capture_payment(payment_intent_id: str):
 
 
 @router.post("/cancel/{payment_intent_id}")
-def cancel_payment(payment_intent_id: str):
+async def cancel_payment(payment_intent_id: str):
     """
     Cancel an authorized payment (void the hold).
     Called when booking is cancelled before completion.
     """
     try:
-        payment_intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+        payment_intent = await _stripe_call(stripe.PaymentIntent.retrieve_async, payment_intent_id)
         
         # If already captured, need to refund instead
         if payment_intent.status == "succeeded":
             # Create refund
-            refund = stripe.Refund.create(
-                payment_intent=payment_intent_id
+            refund = await _stripe_call(
+                stripe.Refund.create_async,
+                payment_intent=payment_intent_id,
+                idempotency_key=f"refund:{payment_intent_id}:{uuid.uuid4()}"
             )
+            _invalidate_intent(payment_intent_id)
             return {
                 "success": True,
                 "action": "refunded",
@@ -138,7 +291,12 @@ def cancel_payment(payment_intent_id: str):
             }
         
         # Cancel the payment intent (void authorization)
-        cancelled = stripe.PaymentIntent.cancel(payment_intent_id)
+        cancelled = await _stripe_call(
+            stripe.PaymentIntent.cancel_async,
+            payment_intent_id,
+            idempotency_key=f"cancel:{payment_intent_id}:{uuid.uuid4()}"
+        )
+        _invalidate_intent(payment_intent_id)
         
         return {
             "success": True,
@@ -153,71 +311,246 @@ def cancel_payment(payment_intent_id: str):
         raise HTTPException(status_code=500, detail=f"Cancel error: {str(e)}")
 
 
+def _verify_stripe_signature(payload: bytes, sig_header: Optional[str]) -> bool:
+    """Check a Stripe-Signature header (t=...,v1=...) against the raw body"""
+    # The SDK compares signatures as str, which raises on non-ASCII input
+    if not sig_header or not sig_header.isascii():
+        return False
+    try:
+        stripe.WebhookSignature.verify_header(
+            payload.decode("utf-8"), sig_header, STRIPE_WEBHOOK_SECRET, WEBHOOK_TOLERANCE_SECONDS
+        )
+    except (stripe.error.SignatureVerificationError, UnicodeDecodeError):
+        return False
+    return True
+
+
 @router.post("/webhook")
 async def stripe_webhook(request: Request):
     """
     Handle Stripe webhook events for payment status updates.
+    Events are verified here and applied by the background event workers.
     """
+    # Unsigned payloads are never accepted; without a secret there is nothing to verify against
+    if not STRIPE_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="Stripe webhooks are not configured")
+    
     payload = await request.body()
     sig_header = request.headers.get("stripe-signature")
-    webhook_secret = os.getenv("STRIPE_WEBHOOK_SECRET")
     
-    # If no webhook secret configured, skip verification (dev mode)
-    if not webhook_secret:
-        try:
-            event = stripe.Event.construct_from(
-                stripe.util.convert_to_stripe_object(payload.decode()),
-                stripe.api_key
-            )
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Invalid payload: {str(e)}")
-    else:
-        try:
-            event = stripe.Webhook.construct_event(
-                payload, sig_header, webhook_secret
-            )
-        except stripe.error.SignatureVerificationError:
-            raise HTTPException(status_code=400, detail="Invalid signature")
+    # Verified with the SDK's header check and parsed into a plain dict, rather than
+    # through stripe.Webhook.construct_event and SDK objects the workers don't need
+    if not _verify_stripe_signature(payload, sig_header):
+        raise HTTPException(status_code=400, detail="Invalid signature")
+    try:
+        event = orjson.loads(payload)
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid payload")
     
-    # Handle the event
+    event_type = event.get("type") if isinstance(event, dict) else None
+    if not event_type or not event.get("id") or not isinstance((event.get("data") or {}).get("object"), dict):
+        raise HTTPException(status_code=400, detail="Invalid payload")
+    try:
+        _event_queue.put_nowait(event)
+    except asyncio.QueueFull:
+        logger.warning(f"Stripe event backlog full, rejecting {event.get('id')} ({event_type}) for retry")
+        raise HTTPException(status_code=503, detail="Webhook backlog full, retry later")
+    
+    return {"status": "success", "event": event_type}
+
+
+async def _on_payment_succeeded(db, payment_intent):
+    # Payment was successfully captured
+    logger.info(f"Payment succeeded: {payment_intent['id']}")
+    # TODO: Update booking status in database
+
+
+async def _on_payment_failed(db, payment_intent):
+    logger.info(f"Payment failed: {payment_intent['id']}")
+    # TODO: Notify customer, update booking status
+
+
+async def _on_payment_canceled(db, payment_intent):
+    logger.info(f"Payment cancelled: {payment_intent['id']}")
+
+
+async def _on_charge_refunded(db, charge):
+    logger.info(f"Refund processed: {charge['id']}")
+
+
+# Stripe event type -> handler(db, event data object)
+_EVENT_HANDLERS = {
+    "payment_intent.succeeded": _on_payment_succeeded,
+    "payment_intent.payment_failed": _on_payment_failed,
+    "payment_intent.canceled": _on_payment_canceled,
+    "charge.refunded": _on_charge_refunded,
+}
+
+
+async def _process_event(db, event):
+    """Apply one Stripe event; the event id makes redelivery a no-op"""
     event_type = event["type"]
     event_data = event["data"]["object"]
     
-    if event_type == "payment_intent.succeeded":
-        # Payment was successfully captured
-        print(f"Payment succeeded: {event_data['id']}")
-        # TODO: Update booking status in database
-        
-    elif event_type == "payment_intent.payment_failed":
-        # Payment failed
-        print(f"Payment failed: {event_data['id']}")
-        # TODO: Notify customer, update booking status
-        
-    elif event_type == "payment_intent.canceled":
-        # Payment was cancelled
-        print(f"Payment cancelled: {event_data['id']}")
-        
+    if event_type.startswith("payment_intent."):
+        _invalidate_intent(event_data.get("id"))
     elif event_type == "charge.refunded":
-        # Refund was processed
-        print(f"Refund processed: {event_data['id']}")
+        _invalidate_intent(event_data.get("payment_intent"))
     
-    return {"status": "success", "event": event_type}
+    handler = _EVENT_HANDLERS.get(event_type)
+    if handler is None:
+        return
+    
+    try:
+        await db.stripe_events.insert_one({
+            "_id": event["id"],
+            "type": event_type,
+            "receivedAt": datetime.utcnow()
+        })
+    except DuplicateKeyError:
+        return
+    except asyncio.CancelledError:
+        await _release_cancelled_event(db, event)
+        raise
+    
+    try:
+        await handler(db, event_data)
+    except asyncio.CancelledError:
+        await _release_cancelled_event(db, event)
+        raise
+    except Exception:
+        # Release the dedupe record so the retry pass can apply the event
+        await db.stripe_events.delete_one({"_id": event["id"]})
+        raise
+
+
+async def _schedule_retry(db, event, error: str, attempted: bool = True) -> None:
+    """Store an unapplied event with its payload for the retry pass"""
+    try:
+        entry = await db.stripe_event_retries.find_one_and_update(
+            {"_id": event["id"]},
+            {
+                "$setOnInsert": {"event": event, "firstFailedAt": datetime.utcnow()},
+                "$inc": {"attempts": 1 if attempted else 0},
+                "$set": {"lastError": error}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        attempts = entry["attempts"]
+        if attempts >= STRIPE_EVENT_MAX_ATTEMPTS:
+            logger.error(f"Giving up on Stripe event {event['id']} after {attempts} attempts: {error}")
+            return
+        delay = STRIPE_EVENT_RETRY_DELAY * 2 ** max(attempts - 1, 0)
+        await db.stripe_event_retries.update_one(
+            {"_id": event["id"]},
+            {"$set": {"nextAttemptAt": datetime.utcnow() + timedelta(seconds=delay)}}
+        )
+    except Exception as e:
+        logger.error(f"Could not store Stripe event {event.get('id')} for retry: {e}")
+
+
+async def _release_cancelled_event(db, event) -> None:
+    """Shutdown cancelled an event mid-way: drop its dedupe record and keep it for the retry pass"""
+    await db.stripe_events.delete_one({"_id": event["id"]})
+    await _schedule_retry(db, event, "cancelled during shutdown", attempted=False)
+
+
+async def _event_worker(db):
+    while True:
+        event = await _event_queue.get()
+        try:
+            await _process_event(db, event)
+        except Exception as e:
+            logger.error(f"Failed to process Stripe event {event.get('id')}, scheduling retry: {e}")
+            await _schedule_retry(db, event, str(e))
+        finally:
+            _event_queue.task_done()
+
+
+async def _retry_failed_events(db) -> None:
+    """Re-apply stored events that are due, claiming each one with a lease"""
+    while True:
+        now = datetime.utcnow()
+        entry = await db.stripe_event_retries.find_one_and_update(
+            {"nextAttemptAt": {"$lte": now}, "attempts": {"$lt": STRIPE_EVENT_MAX_ATTEMPTS}},
+            {"$set": {"nextAttemptAt": now + timedelta(seconds=STRIPE_EVENT_RETRY_LEASE)}}
+        )
+        if entry is None:
+            return
+        event = entry["event"]
+        try:
+            await _process_event(db, event)
+        except Exception as e:
+            logger.error(f"Retry of Stripe event {event['id']} failed: {e}")
+            await _schedule_retry(db, event, str(e))
+            continue
+        await db.stripe_event_retries.delete_one({"_id": event["id"]})
+        logger.info(f"Applied Stripe event {event['id']} on retry")
+
+
+async def _event_retrier(db):
+    while True:
+        try:
+            await _retry_failed_events(db)
+        except Exception as e:
+            logger.error(f"Stripe event retry pass failed: {e}")
+        await asyncio.sleep(STRIPE_EVENT_RETRY_INTERVAL)
+
+
+async def check_stripe_credentials(timeout: float = 10.0) -> bool:
+    """Make one authenticated Stripe call so a bad or missing key shows up in
+    the startup logs instead of on the first booking (run in the background on app startup)"""
+    if not stripe.api_key:
+        logger.error("STRIPE_SECRET_KEY is not set; payment endpoints will fail")
+        return False
+    try:
+        await asyncio.wait_for(stripe.Account.retrieve_async(), timeout=timeout)
+    except stripe.error.AuthenticationError:
+        logger.error("STRIPE_SECRET_KEY was rejected by Stripe; payment endpoints will fail")
+        return False
+    except Exception as e:
+        logger.warning(f"Could not verify Stripe credentials at startup: {e}")
+        return False
+    return True
+
+
+def start_stripe_event_workers(db) -> None:
+    """Start the webhook event workers and the retry pass (called on app startup)"""
+    if _event_workers:
+        return
+    for _ in range(STRIPE_EVENT_WORKERS):
+        _event_workers.append(asyncio.create_task(_event_worker(db)))
+    _event_workers.append(asyncio.create_task(_event_retrier(db)))
+
+
+async def stop_stripe_event_workers(db, timeout: float = 5.0) -> None:
+    """Give queued events a chance to finish, then stop the workers and store
+    anything still queued for the retry pass (called on app shutdown)"""
+    if not _event_workers:
+        return
+    try:
+        await asyncio.wait_for(_event_queue.join(), timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Stopping before the Stripe event backlog drained; unprocessed events are kept for retry")
+    for task in _event_workers:
+        task.cancel()
+    await asyncio.gather(*_event_workers, return_exceptions=True)
+    _event_workers.clear()
+    while not _event_queue.empty():
+        event = _event_queue.get_nowait()
+        await _schedule_retry(db, event, "not processed before shutdown", attempted=False)
 
 
 @router.get("/payment-intent/{payment_intent_id}")
-def get_payment_intent(payment_intent_id: str):
+async def get_payment_intent(payment_intent_id: str):
     """Get the status of a payment intent"""
+    cached = _get_cached_intent(payment_intent_id)
+    if cached is not None:
+        return cached
+    
     try:
-        payment_intent = stripe.PaymentIntent.retrieve(payment_intent_id)
-        
-        return {
-            "id": payment_intent.id,
-            "amount": payment_intent.amount,
-            "currency": payment_intent.currency,
-            "status": payment_intent.status,
-            "metadata": payment_intent.metadata,
-            "created": payment_intent.created
-        }
+        return await _retrieve_intent(payment_intent_id)
     except stripe.error.InvalidRequestError as e:
         raise HTTPException(status_code=404, detail="Payment not found")
     except Exception as e:
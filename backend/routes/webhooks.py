@@ -1,19 +1,121 @@
 """Webhook Routes for CleanGrid - Inbound from HR Bank"""
-from fastapi import APIRouter, HTTPException, Request, Header
-from typing import Dict, Optional
-from datetime import datetime
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, Header
+from fastapi.responses import ORJSONResponse
+from typing import Optional
+from datetime import datetime, timedelta
 from bson import ObjectId
+from utils.hrbank_webhook import get_hrbank_service
+from utils.ids import parse_object_id
+import asyncio
 import logging
-import json
+import orjson
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/webhooks", tags=["Webhooks"])
+router = APIRouter(prefix="/webhooks", tags=["Webhooks"], default_response_class=ORJSONResponse)
 
 
-@router.post("/hrbank/status", response_model=Dict)
+# Status updates are acknowledged with 202 before they are applied, so HR Bank
+# won't redeliver one that later raises. Those are stored with their payload in
+# hrbank_webhook_retries and re-applied with backoff, like Stripe events.
+# Updates rejected by process_status_update (unknown job or status) are not retried.
+HRBANK_RETRY_INTERVAL = 30  # seconds between retry passes
+HRBANK_RETRY_DELAY = 60  # seconds before the first retry, doubled per failed attempt
+HRBANK_RETRY_LEASE = 300  # seconds a claimed retry is hidden from other passes
+HRBANK_MAX_ATTEMPTS = 8  # then kept in the collection for manual replay
+
+_retrier_task: Optional[asyncio.Task] = None
+
+
+def _retry_at(attempts: int) -> datetime:
+    return datetime.utcnow() + timedelta(seconds=HRBANK_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+async def _apply_status_update(hrbank, payload: dict) -> None:
+    result = await hrbank.process_status_update(payload)
+    if not result.get("success"):
+        logger.error(f"Failed to process webhook: {result.get('error')}")
+
+
+async def _process_status_update(db, hrbank, payload: dict) -> None:
+    """Apply an acknowledged HR Bank status update, storing it for retry if it raises"""
+    try:
+        await _apply_status_update(hrbank, payload)
+    except Exception as e:
+        logger.error(f"Webhook processing error, scheduling retry: {e}")
+        try:
+            await db.hrbank_webhook_retries.insert_one({
+                "_id": ObjectId(),
+                "payload": payload,
+                "attempts": 1,
+                "lastError": str(e),
+                "firstFailedAt": datetime.utcnow(),
+                "nextAttemptAt": _retry_at(1)
+            })
+        except Exception as store_error:
+            logger.error(f"Could not store HR Bank webhook for retry: {store_error}")
+
+
+async def _retry_failed_updates(db) -> None:
+    """Re-apply stored status updates that are due, claiming each one with a lease"""
+    hrbank = get_hrbank_service(db)
+    while True:
+        now = datetime.utcnow()
+        entry = await db.hrbank_webhook_retries.find_one_and_update(
+            {"nextAttemptAt": {"$lte": now}, "attempts": {"$lt": HRBANK_MAX_ATTEMPTS}},
+            {"$set": {"nextAttemptAt": now + timedelta(seconds=HRBANK_RETRY_LEASE)}}
+        )
+        if entry is None:
+            return
+        try:
+            await _apply_status_update(hrbank, entry["payload"])
+        except Exception as e:
+            attempts = entry["attempts"] + 1
+            if attempts >= HRBANK_MAX_ATTEMPTS:
+                logger.error(f"Giving up on HR Bank webhook {entry['_id']} after {attempts} attempts: {e}")
+            else:
+                logger.error(f"Retry of HR Bank webhook {entry['_id']} failed: {e}")
+            await db.hrbank_webhook_retries.update_one(
+                {"_id": entry["_id"]},
+                {"$set": {"attempts": attempts, "lastError": str(e), "nextAttemptAt": _retry_at(attempts)}}
+            )
+            continue
+        await db.hrbank_webhook_retries.delete_one({"_id": entry["_id"]})
+
+
+async def _retrier(db) -> None:
+    while True:
+        try:
+            await _retry_failed_updates(db)
+        except Exception as e:
+            logger.error(f"HR Bank webhook retry pass failed: {e}")
+        await asyncio.sleep(HRBANK_RETRY_INTERVAL)
+
+
+def start_hrbank_retrier(db) -> None:
+    """Start the failed status update retry pass (called on app startup)"""
+    global _retrier_task
+    if _retrier_task is None or _retrier_task.done():
+        _retrier_task = asyncio.create_task(_retrier(db))
+
+
+async def stop_hrbank_retrier() -> None:
+    """Stop the retry pass (called on app shutdown); claimed entries are retried after their lease"""
+    global _retrier_task
+    if _retrier_task is None:
+        return
+    _retrier_task.cancel()
+    try:
+        await _retrier_task
+    except asyncio.CancelledError:
+        pass
+    _retrier_task = None
+
+
+@router.post("/hrbank/status", status_code=202)
 async def hrbank_status_webhook(
     request: Request,
+    background_tasks: BackgroundTasks,
     x_hrbank_signature: Optional[str] = Header(None)
 ):
     """
@@ -42,50 +144,35 @@ async def hrbank_status_webhook(
     """
     db = request.app.state.db
     
+    # Get raw body for signature verification
+    body = await request.body()
     try:
-        # Get raw body for signature verification
-        body = await request.body()
-        payload = json.loads(body)
-        
-        # Log the webhook
-        logger.info(f"Received HR Bank webhook: {payload.get('event_type')}")
-        
-        # Verify signature (optional in dev)
-        from utils.hrbank_webhook import get_hrbank_service
-        hrbank = get_hrbank_service(db)
-        
-        if x_hrbank_signature:
-            if not hrbank.verify_webhook_signature(body, x_hrbank_signature):
-                logger.warning("Invalid webhook signature")
-                raise HTTPException(status_code=401, detail="Invalid signature")
-        
-        # Process the status update
-        result = await hrbank.process_status_update(payload)
-        
-        if not result.get("success"):
-            logger.error(f"Failed to process webhook: {result.get('error')}")
-            # Still return 200 to acknowledge receipt
-            return {
-                "success": False,
-                "error": result.get("error"),
-                "acknowledged": True
-            }
-        
-        return {
-            "success": True,
-            "message": result.get("message"),
-            "acknowledged": True
-        }
-        
-    except json.JSONDecodeError:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
-    except Exception as e:
-        logger.error(f"Webhook processing error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    
+    # Log the webhook
+    logger.info(f"Received HR Bank webhook: {payload.get('event_type')}")
+    
+    # Verify signature (optional in dev)
+    hrbank = get_hrbank_service(db)
+    
+    if x_hrbank_signature:
+        if not hrbank.verify_webhook_signature(body, x_hrbank_signature):
+            logger.warning("Invalid webhook signature")
+            raise HTTPException(status_code=401, detail="Invalid signature")
+    
+    # Acknowledge receipt now and apply the status update after the response is sent
+    background_tasks.add_task(_process_status_update, db, hrbank, payload)
+    
+    return {
+        "success": True,
+        "acknowledged": True
+    }
 
 
-@router.post("/hrbank/test", response_model=Dict)
-async def test_hrbank_webhook(request: Request):
+@router.post("/hrbank/test")
+async def test_hrbank_webhook(request: Request, background_tasks: BackgroundTasks):
     """Test endpoint for HR Bank webhook integration"""
     db = request.app.state.db
     
@@ -102,8 +189,8 @@ async def test_hrbank_webhook(request: Request):
         }
     }
     
-    # Log test
-    await db.webhook_logs.insert_one({
+    # Log test after the response is sent
+    background_tasks.add_task(db.webhook_logs.insert_one, {
         "_id": ObjectId(),
         "direction": "inbound",
         "source": "hrbank_test",
@@ -119,12 +206,19 @@ async def test_hrbank_webhook(request: Request):
     }
 
 
-@router.get("/hrbank/logs", response_model=Dict)
-async def get_webhook_logs(request: Request, limit: int = 50):
-    """Get recent webhook logs (admin only)"""
+@router.get("/hrbank/logs")
+async def get_webhook_logs(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500),
+    after: Optional[str] = None
+):
+    """Get recent webhook logs, newest first (admin only); pass `after` = previous `next_cursor` for the next page"""
     db = request.app.state.db
     
-    logs = await db.webhook_logs.find({}).sort("processedAt", -1).limit(limit).to_list(limit)
+    # Log ids are minted alongside processedAt, so _id order is processing order
+    # and each page is a bounded walk of the _id index however deep it is
+    query = {"_id": {"$lt": parse_object_id(after, "cursor")}} if after else {}
+    logs = await db.webhook_logs.find(query).sort("_id", -1).limit(limit).to_list(limit)
     
     return {
         "success": True,
@@ -136,6 +230,7 @@ async def get_webhook_logs(request: Request, limit: int = 50):
                 "event_type": log.get("eventType"),
                 "job_id": log.get("jobId"),
                 "processed_at": log.get("processedAt")
-            } for log in logs]
+            } for log in logs],
+            "next_cursor": str(logs[-1]["_id"]) if len(logs) == limit else None
         }
     }
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
@@ -6,13 +6,18 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+import asyncio
 import os
 import logging
+import queue
 import httpx
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, EmailStr
 from typing import List, Optional
 from bson import ObjectId
+from bson.errors import InvalidId
+from pydantic_core import core_schema
 from quote_calculator import (
     QuoteCalculator, QuoteRequest as EnhancedQuoteRequest,
     QuoteResponse as EnhancedQuoteResponse, AVAILABLE_ADDONS
@@ -23,7 +28,19 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# Pool sized for the dashboard's bursts of concurrent queries; minPoolSize keeps
+# connections warm so requests don't pay the connection handshake. Both can be
+# tuned per deployment (e.g. raise them with the worker count); Motor's own
+# thread pool is sized by the MOTOR_MAX_WORKERS env var, read by Motor itself.
+client = AsyncIOMotorClient(
+    mongo_url,
+    maxPoolSize=int(os.environ.get("MONGO_MAX_POOL_SIZE", "50")),
+    minPoolSize=int(os.environ.get("MONGO_MIN_POOL_SIZE", "10")),
+    maxIdleTimeMS=60000,
+    waitQueueTimeoutMS=5000,
+    serverSelectionTimeoutMS=5000,
+    retryWrites=True
+)
 db = client[os.environ['DB_NAME']]
 
 # Security
@@ -44,18 +61,31 @@ api_router = APIRouter(prefix="/api")
 
 class PyObjectId(ObjectId):
     @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
+    def __get_pydantic_core_schema__(cls, _source_type, _handler):
+        return core_schema.no_info_plain_validator_function(
+            cls.validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(str, when_used="json")
+        )
 
     @classmethod
     def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid objectid")
-        return ObjectId(v)
+        # BSON documents already carry ObjectId instances
+        if isinstance(v, ObjectId):
+            return v
+        # ObjectId(None) would mint a fresh id, so only parse str/bytes
+        if isinstance(v, (str, bytes)):
+            try:
+                return ObjectId(v)
+            except InvalidId:
+                pass
+        raise ValueError("Invalid objectid")
 
     @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
+    def __get_pydantic_json_schema__(cls, _core_schema, _handler):
+        return {"type": "string"}
+
+# Shared config for models mapped from Mongo documents (_id alias)
+DB_MODEL_CONFIG = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -88,10 +118,7 @@ class User(UserBase):
     profilePhoto: Optional[str] = None  # Base64 encoded photo or URL
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 class UserProfileUpdate(BaseModel):
     name: Optional[str] = None
@@ -120,9 +147,7 @@ class Property(PropertyCreate):
     isActive: bool = True  # Active/Inactive status
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 # Task Models
 class Task(BaseModel):
@@ -136,9 +161,7 @@ class Task(BaseModel):
     completedAt: Optional[datetime] = None
     notes: Optional[str] = None
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 class TaskUpdate(BaseModel):
     isCompleted: bool
@@ -163,9 +186,7 @@ class Service(ServiceCreate):
     id: str = Field(alias="_id")
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 class QuoteRequest(BaseModel):
     serviceId: str
@@ -210,9 +231,7 @@ class Booking(BookingCreate):
     hrbankTaskId: Optional[str] = None
     hrbankWorkplace: Optional[str] = None
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 class BookingStatusUpdate(BaseModel):
     status: str
@@ -227,9 +246,7 @@ class Review(ReviewCreate):
     customerId: str
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = DB_MODEL_CONFIG
 
 class FSAAssignment(BaseModel):
     franchiseeId: str
@@ -273,12 +290,14 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
 
 # ==================== HELPER FUNCTIONS ====================
 
+_STRIP_SPACES = str.maketrans("", "", " ")
+
 def extract_fsa(postal_code: str) -> str:
     """Extract FIRST 3 characters from postal code (e.g., N8L1E6 -> N8L)"""
-    clean_code = postal_code.replace(" ", "").upper()
-    if len(clean_code) >= 3:
-        return clean_code[:3]  # FIRST 3 characters, not last
-    return clean_code
+    # Fast path: no spaces within the first 3 chars, so only slice those
+    if " " not in postal_code[:3]:
+        return postal_code[:3].upper()
+    return postal_code.translate(_STRIP_SPACES)[:3].upper()
 
 async def find_franchisee_by_fsa(fsa_code: str) -> Optional[dict]:
     """Find a franchisee assigned to this FSA"""
@@ -544,6 +563,7 @@ async def reset_password(request: PasswordResetConfirm):
             "$unset": {"resetToken": "", "resetTokenExpires": ""}
         }
     )
+    invalidate_user(user["_id"])
     
     # Send confirmation email
     try:
@@ -579,6 +599,7 @@ async def update_profile(profile_update: UserProfileUpdate, current_user: User =
         {"_id": ObjectId(current_user.id)},
         {"$set": update_data}
     )
+    invalidate_user(current_user.id)
     
     # Fetch updated user (even if no changes, return current state)
     updated_user = await db.users.find_one({"_id": ObjectId(current_user.id)})
@@ -656,15 +677,15 @@ async def calculate_quote(quote_req: QuoteRequest):
 # ENHANCED QUOTE ROUTES (CleanUnits-based)
 calculator = QuoteCalculator()
 
-@api_router.post("/quotes/enhanced", response_model=EnhancedQuoteResponse)
+@api_router.post("/quotes/enhanced", response_class=Response, responses={200: {"model": EnhancedQuoteResponse}})
 async def calculate_enhanced_quote(quote_req: EnhancedQuoteRequest):
     """
     Enhanced quote calculator with CleanUnits system
     Supports residential and commercial with real-time pricing
     """
     try:
-        quote = calculator.calculate_quote(quote_req)
-        return quote
+        # Pre-serialized bytes skip FastAPI's response re-validation/encoding
+        return Response(calculator.calculate_quote_json(quote_req), media_type="application/json")
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -1002,6 +1023,7 @@ async def assign_fsa(assignment: FSAAssignment, current_user: User = Depends(get
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Franchisee not found")
+    invalidate_user(assignment.franchiseeId)
     
     return {"message": "FSA codes assigned successfully"}
 
@@ -1384,10 +1406,15 @@ async def get_workforce_jobs(current_user: User = Depends(get_current_user)):
     return jobs
 
 # Import and include new CleanGrid routes BEFORE including api_router in app
-from routes.franchisee import router as franchisee_router
-from routes.webhooks import router as webhooks_router
+from routes.franchisee import router as franchisee_router, invalidate_user
+from routes.webhooks import router as webhooks_router, start_hrbank_retrier, stop_hrbank_retrier
 from routes.admin import router as admin_router
-from routes.payments import router as payments_router
+from routes.payments import (
+    router as payments_router, check_stripe_credentials,
+    start_stripe_event_workers, stop_stripe_event_workers
+)
+from utils.indexes import ensure_indexes
+from utils.audit import start_audit_writer, stop_audit_writer
 
 api_router.include_router(franchisee_router)
 api_router.include_router(webhooks_router)
@@ -1401,6 +1428,12 @@ app.include_router(api_router)
 @app.on_event("startup")
 async def startup_db_client():
     app.state.db = db
+    await ensure_indexes(db)
+    start_audit_writer(db)
+    start_stripe_event_workers(db)
+    start_hrbank_retrier(db)
+    # Only logs, so readiness does not wait on a Stripe round trip
+    app.state.stripe_check = asyncio.create_task(check_stripe_credentials())
 
 app.add_middleware(
     CORSMiddleware,
@@ -1410,13 +1443,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging. Handlers only enqueue records; a listener thread does the
+# formatting and stream writes so request handlers never block on stderr.
+_log_queue = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_log_listener = QueueListener(_log_queue, _log_handler)
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))  # final formatting happens in the listener
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
+_log_listener.start()
 logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    app.state.stripe_check.cancel()
+    await stop_stripe_event_workers(db)
+    await stop_hrbank_retrier()
+    await stop_audit_writer()
     client.close()
+    _log_listener.stop()
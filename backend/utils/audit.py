@@ -0,0 +1,69 @@
+"""Batched audit log writer
+
+Audit entries are queued in memory and flushed with insert_many from a
+background task, so request handlers don't wait on an audit round trip.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+AUDIT_BATCH_SIZE = 500
+AUDIT_FLUSH_INTERVAL = 0.05  # seconds to wait for more entries before flushing
+
+_audit_queue: "asyncio.Queue[dict]" = asyncio.Queue()
+_writer_task: Optional[asyncio.Task] = None
+
+
+def log_audit(entry: dict) -> None:
+    """Queue an audit log entry for the next batched write"""
+    _audit_queue.put_nowait(entry)
+
+
+async def _write(db, entries: list) -> None:
+    try:
+        await db.audit_logs.insert_many(entries, ordered=False)
+    except Exception as e:
+        logger.warning(f"Failed to write {len(entries)} audit log entries: {e}")
+
+
+async def _run(db) -> None:
+    batch = []
+    try:
+        while True:
+            batch.append(await _audit_queue.get())
+            while len(batch) < AUDIT_BATCH_SIZE:
+                try:
+                    batch.append(await asyncio.wait_for(_audit_queue.get(), timeout=AUDIT_FLUSH_INTERVAL))
+                except asyncio.TimeoutError:
+                    break
+            await _write(db, batch)
+            batch = []
+    except asyncio.CancelledError:
+        # Shutdown: flush whatever is still buffered before exiting
+        while not _audit_queue.empty():
+            batch.append(_audit_queue.get_nowait())
+        if batch:
+            await _write(db, batch)
+        raise
+
+
+def start_audit_writer(db) -> None:
+    """Start the background flush task (called on app startup)"""
+    global _writer_task
+    if _writer_task is None or _writer_task.done():
+        _writer_task = asyncio.create_task(_run(db))
+
+
+async def stop_audit_writer() -> None:
+    """Flush pending entries and stop the background task (called on app shutdown)"""
+    global _writer_task
+    if _writer_task is None:
+        return
+    _writer_task.cancel()
+    try:
+        await _writer_task
+    except asyncio.CancelledError:
+        pass
+    _writer_task = None
@@ -3,7 +3,6 @@ import os
 import logging
 import httpx
 import hmac
-import hashlib
 import json
 from datetime import datetime
 from typing import Dict, Any, Optional
@@ -15,6 +14,7 @@ logger = logging.getLogger(__name__)
 HRBANK_API_URL = os.environ.get('HRBANK_API_URL', '')
 HRBANK_API_KEY = os.environ.get('HRBANK_API_KEY', '')
 HRBANK_WEBHOOK_SECRET = os.environ.get('HRBANK_WEBHOOK_SECRET', 'cleangrid-webhook-secret')
+_HRBANK_WEBHOOK_KEY = HRBANK_WEBHOOK_SECRET.encode()
 
 # Platform callback URL
 CALLBACK_BASE_URL = os.environ.get('CALLBACK_BASE_URL', 'https://cleangrid.com')
@@ -334,12 +334,9 @@ class HRBankWebhookService:
     
     def verify_webhook_signature(self, payload: bytes, signature: str, secret: str = None) -> bool:
         """Verify the HMAC signature of incoming webhook"""
-        secret = secret or HRBANK_WEBHOOK_SECRET
-        expected_signature = hmac.new(
-            secret.encode(),
-            payload,
-            hashlib.sha256
-        ).hexdigest()
+        key = secret.encode() if secret else _HRBANK_WEBHOOK_KEY
+        # One-shot HMAC runs entirely in OpenSSL, without building an hmac object
+        expected_signature = hmac.digest(key, payload, "sha256").hex()
         
         return hmac.compare_digest(f"sha256={expected_signature}", signature)
     
@@ -0,0 +1,32 @@
+"""ObjectId parsing shared by the route modules"""
+from typing import Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+
+def parse_object_id(value: Optional[str], name: str = "id") -> ObjectId:
+    """Parse a hex id, answering malformed input with a 400 rather than a 500"""
+    if isinstance(value, str):
+        try:
+            return ObjectId(value)
+        except InvalidId:
+            pass
+    raise HTTPException(status_code=400, detail=f"Invalid {name}")
+
+
+# Path parameter dependencies: ids are parsed once, before any DB work
+async def application_oid(application_id: str) -> ObjectId:
+    return parse_object_id(application_id, "application_id")
+
+
+async def franchisee_oid(franchisee_id: str) -> ObjectId:
+    return parse_object_id(franchisee_id, "franchisee_id")
+
+
+async def job_oid(job_id: str) -> ObjectId:
+    return parse_object_id(job_id, "job_id")
+
+
+async def settlement_oid(settlement_id: str) -> ObjectId:
+    return parse_object_id(settlement_id, "settlement_id")
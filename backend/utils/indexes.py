@@ -0,0 +1,61 @@
+"""MongoDB index definitions for CleanGrid, created at startup"""
+import logging
+from pymongo import ASCENDING, DESCENDING
+
+logger = logging.getLogger(__name__)
+
+# collection -> list of (keys, options)
+INDEXES = {
+    "franchisees": [
+        # Admin application review: filter by status, newest submissions first
+        ([("status", ASCENDING), ("applicationSubmittedAt", DESCENDING)], {}),
+        # Franchisee portal: the caller's franchisee by owner, else by application email
+        ([("ownerId", ASCENDING)], {}),
+        ([("email", ASCENDING)], {"unique": True, "partialFilterExpression": {"email": {"$type": "string"}}}),
+    ],
+    "jobs": [
+        # Admin job list: optional status/FSA filters, newest first
+        ([("status", ASCENDING), ("fsaCode", ASCENDING), ("createdAt", DESCENDING)], {}),
+        ([("createdAt", DESCENDING)], {}),
+        # Franchisee portal: own jobs by status, by schedule, and dashboard counters
+        ([("franchiseeId", ASCENDING), ("status", ASCENDING)], {}),
+        ([("franchiseeId", ASCENDING), ("scheduledDate", ASCENDING)], {}),
+        ([("franchiseeId", ASCENDING), ("createdAt", ASCENDING)], {}),
+    ],
+    "settlement_statements": [
+        ([("payoutStatus", ASCENDING), ("periodEnd", DESCENDING)], {}),
+        ([("franchiseeId", ASCENDING), ("periodEnd", DESCENDING)], {}),
+    ],
+    "territories": [
+        ([("fsaCode", ASCENDING)], {"unique": True}),
+    ],
+    "compliance_documents": [
+        ([("franchiseeId", ASCENDING), ("docType", ASCENDING), ("status", ASCENDING)], {}),
+    ],
+    "audit_logs": [
+        ([("resourceId", ASCENDING), ("createdAt", DESCENDING)], {}),
+    ],
+    "stripe_events": [
+        # Processed webhook event ids only need to outlive Stripe's 3-day retry window
+        ([("receivedAt", ASCENDING)], {"expireAfterSeconds": 7 * 24 * 3600}),
+    ],
+    "hrbank_webhook_retries": [
+        # Retry pass: due status updates first
+        ([("nextAttemptAt", ASCENDING)], {}),
+    ],
+    "stripe_event_retries": [
+        # Retry pass: due events first
+        ([("nextAttemptAt", ASCENDING)], {}),
+    ],
+}
+
+
+async def ensure_indexes(db) -> None:
+    """Create all indexes (idempotent). Failures are logged, not raised,
+    so existing data that violates an index never blocks startup."""
+    for collection, indexes in INDEXES.items():
+        for keys, options in indexes:
+            try:
+                await db[collection].create_index(keys, **options)
+            except Exception as e:
+                logger.warning(f"Failed to create index {keys} on {collection}: {e}")
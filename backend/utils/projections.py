@@ -0,0 +1,7 @@
+"""Aggregation $project helpers shared by the route modules"""
+from typing import Dict
+
+
+def project_field(name: str, default=None) -> Dict:
+    """Projection expression for a document field, `default` when missing or null"""
+    return {"$ifNull": [f"${name}", default]}
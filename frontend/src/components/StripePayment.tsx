@@ -54,6 +54,8 @@ function PaymentForm({ amount, bookingId, serviceName, customerEmail, onSuccess,
         customer_email: customerEmail,
         customer_name: customerEmail.split('@')[0],
         service_name: serviceName,
+        // Fresh per attempt, so a retry after a cancelled or failed intent gets a new one
+        attempt_id: crypto.randomUUID(),
       })
 
       // Confirm the payment
@@ -0,0 +1,82 @@
+"""Tests for the HR Bank status update retry store in routes/webhooks.py"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from routes import webhooks
+
+PAYLOAD = {"event_type": "work_order.status_changed", "cleangrid_job_id": "job_1", "status": "started"}
+
+
+class FakeHRBank:
+    def __init__(self, fail: int = 0, result: dict = None):
+        self.fail = fail
+        self.result = result or {"success": True}
+        self.applied = []
+
+    async def process_status_update(self, payload):
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("mongo unavailable")
+        self.applied.append(payload)
+        return self.result
+
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["cleangrid_test"]
+
+
+def _use(monkeypatch, hrbank):
+    monkeypatch.setattr(webhooks, "get_hrbank_service", lambda db: hrbank)
+
+
+async def _make_due(db):
+    await db.hrbank_webhook_retries.update_many({}, {"$set": {"nextAttemptAt": datetime.utcnow() - timedelta(seconds=1)}})
+
+
+def test_raising_update_is_stored_and_retried(db, monkeypatch):
+    async def run():
+        hrbank = FakeHRBank(fail=1)
+        _use(monkeypatch, hrbank)
+        await webhooks._process_status_update(db, hrbank, PAYLOAD)
+        entry = await db.hrbank_webhook_retries.find_one()
+        assert entry["payload"] == PAYLOAD
+        assert entry["attempts"] == 1
+        await webhooks._retry_failed_updates(db)
+        assert hrbank.applied == []  # not due yet
+        await _make_due(db)
+        await webhooks._retry_failed_updates(db)
+        assert hrbank.applied == [PAYLOAD]
+        assert await db.hrbank_webhook_retries.count_documents({}) == 0
+
+    asyncio.run(run())
+
+
+def test_rejected_update_is_not_retried(db, monkeypatch):
+    async def run():
+        hrbank = FakeHRBank(result={"success": False, "error": "Unknown status: x"})
+        await webhooks._process_status_update(db, hrbank, PAYLOAD)
+        assert await db.hrbank_webhook_retries.count_documents({}) == 0
+
+    asyncio.run(run())
+
+
+def test_failed_retry_backs_off_until_exhausted(db, monkeypatch):
+    async def run():
+        hrbank = FakeHRBank(fail=webhooks.HRBANK_MAX_ATTEMPTS)
+        _use(monkeypatch, hrbank)
+        await webhooks._process_status_update(db, hrbank, PAYLOAD)
+        for attempts in range(2, webhooks.HRBANK_MAX_ATTEMPTS + 1):
+            await _make_due(db)
+            await webhooks._retry_failed_updates(db)
+            entry = await db.hrbank_webhook_retries.find_one()
+            assert entry["attempts"] == attempts
+        await _make_due(db)
+        await webhooks._retry_failed_updates(db)
+        assert hrbank.applied == []
+        assert (await db.hrbank_webhook_retries.find_one())["attempts"] == webhooks.HRBANK_MAX_ATTEMPTS
+
+    asyncio.run(run())
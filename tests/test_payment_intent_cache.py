@@ -0,0 +1,108 @@
+"""Tests for the PaymentIntent cache and single-flight retrieval in routes/payments.py"""
+import asyncio
+import types
+
+import pytest
+import stripe
+from fastapi import HTTPException
+
+from routes import payments
+
+
+@pytest.fixture
+def stripe_intents(monkeypatch):
+    """Stub retrieve_async: returns the current `status` after `delay` and counts calls"""
+    state = {"calls": 0, "status": "requires_capture", "delay": 0.05}
+
+    async def retrieve_async(payment_intent_id, **params):
+        state["calls"] += 1
+        status = state["status"]
+        await asyncio.sleep(state["delay"])
+        return types.SimpleNamespace(
+            id=payment_intent_id, amount=1000, currency="cad",
+            status=status, metadata={}, created=0
+        )
+
+    monkeypatch.setattr(stripe.PaymentIntent, "retrieve_async", retrieve_async)
+    monkeypatch.setattr(payments, "_payment_intent_cache", {})
+    monkeypatch.setattr(payments, "_intent_fetches", {})
+    monkeypatch.setattr(payments, "_intent_generations", {})
+    return state
+
+
+def _assert_drained():
+    assert payments._intent_fetches == {}
+    assert payments._intent_generations == {}
+
+
+def test_concurrent_cold_polls_share_one_call(stripe_intents):
+    async def run():
+        results = await asyncio.gather(*[payments.get_payment_intent("pi_1") for _ in range(10)])
+        assert stripe_intents["calls"] == 1
+        assert all(result["status"] == "requires_capture" for result in results)
+        # Warm poll is served from the cache
+        await payments.get_payment_intent("pi_1")
+        assert stripe_intents["calls"] == 1
+        _assert_drained()
+
+    asyncio.run(run())
+
+
+def test_invalidation_during_fetch_does_not_recache(stripe_intents):
+    async def run():
+        stale_poll = asyncio.create_task(payments.get_payment_intent("pi_1"))
+        await asyncio.sleep(0.01)
+        # A capture lands while the first retrieve is in flight
+        stripe_intents["status"] = "succeeded"
+        payments._invalidate_intent("pi_1")
+        fresh_poll = asyncio.create_task(payments.get_payment_intent("pi_1"))
+        stale, fresh = await asyncio.gather(stale_poll, fresh_poll)
+        assert stale["status"] == "requires_capture"
+        assert fresh["status"] == "succeeded"
+        assert stripe_intents["calls"] == 2
+        assert payments._get_cached_intent("pi_1")["status"] == "succeeded"
+        _assert_drained()
+
+    asyncio.run(run())
+
+
+def test_invalidation_with_only_a_stale_fetch_leaves_cache_empty(stripe_intents):
+    async def run():
+        poll = asyncio.create_task(payments.get_payment_intent("pi_1"))
+        await asyncio.sleep(0.01)
+        payments._invalidate_intent("pi_1")
+        await poll
+        assert payments._get_cached_intent("pi_1") is None
+        _assert_drained()
+
+    asyncio.run(run())
+
+
+def test_cancelled_poller_does_not_cancel_shared_fetch(stripe_intents):
+    async def run():
+        first = asyncio.create_task(payments.get_payment_intent("pi_1"))
+        second = asyncio.create_task(payments.get_payment_intent("pi_1"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert (await second)["status"] == "requires_capture"
+        assert stripe_intents["calls"] == 1
+        _assert_drained()
+
+    asyncio.run(run())
+
+
+def test_failed_fetch_drains_state(stripe_intents, monkeypatch):
+    async def missing(payment_intent_id, **params):
+        await asyncio.sleep(0.01)
+        raise stripe.error.InvalidRequestError("No such payment_intent", "id")
+
+    monkeypatch.setattr(stripe.PaymentIntent, "retrieve_async", missing)
+
+    async def run():
+        with pytest.raises(HTTPException) as excinfo:
+            await payments.get_payment_intent("pi_missing")
+        assert excinfo.value.status_code == 404
+        assert payments._get_cached_intent("pi_missing") is None
+        _assert_drained()
+
+    asyncio.run(run())
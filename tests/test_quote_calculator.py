@@ -0,0 +1,99 @@
+"""Parity tests for the quote calculator's scalar, cached, JSON and batch paths"""
+import json
+import random
+
+import pydantic
+import pytest
+
+from quote_calculator import PricingConfig, QuoteCalculator, QuoteRequest
+
+
+def _random_request(rng: random.Random, i: int) -> QuoteRequest:
+    return QuoteRequest(
+        job_type=rng.choice(["residential", "commercial", "unknown"]),
+        postal_code=f"M{i % 10}V {i}",
+        condition=rng.choice(["light", "normal", "heavy", "unlisted"]),
+        service_level=rng.choice(["standard", "deep", "move_in_out", "post_reno", "unlisted"]),
+        frequency=rng.choice(["one_time", "weekly", "biweekly", "monthly", "unlisted"]),
+        time_window=rng.choice(["normal", "after_hours", "same_day", "unlisted"]),
+        tax_rate=rng.choice([0.0, 0.05, 0.13, 0.15]),
+        add_ons=[
+            {"id": f"a{j}", "name": f"Add-on {j}", "price": rng.choice([6.0, 12.5, 35.0]), "quantity": rng.randint(1, 5)}
+            for j in range(rng.randint(0, 3))
+        ],
+        residential={
+            "bedrooms": rng.randint(0, 6),
+            "bathrooms": rng.randint(0, 4),
+            "kitchen": rng.random() < 0.5,
+            "living_rooms": rng.randint(0, 3),
+            "dining_rooms": rng.randint(0, 2),
+            "stairs": rng.random() < 0.5,
+            "hallways": rng.random() < 0.5,
+            "laundry_room": rng.random() < 0.5,
+        },
+        commercial={
+            "sqft": rng.choice([None, 0, 499, 500, rng.randint(1, 20000)]),
+            "washrooms": rng.randint(0, 5),
+            "kitchenette": rng.random() < 0.5,
+            "floor_service": rng.choice([None, "vacuum_mop", "machine_scrub", "buff_polish", "unlisted"]),
+            "trash_service": rng.choice(["none", "basic", "heavy"]),
+            "high_touch_disinfection": rng.random() < 0.5,
+        },
+    )
+
+
+@pytest.fixture(scope="module")
+def requests():
+    rng = random.Random(20)
+    return [_random_request(rng, i) for i in range(500)]
+
+
+def test_batch_matches_scalar(requests):
+    calculator = QuoteCalculator()
+    batch = [q.model_dump() for q in calculator.calculate_quotes_batch(requests)]
+    # A fresh calculator, so every scalar result is computed rather than served from the cache
+    scalar = [QuoteCalculator().calculate_quote(r).model_dump() for r in requests]
+    assert batch == scalar
+
+
+def test_cached_results_match_fresh(requests):
+    calculator = QuoteCalculator()
+    first = [calculator.calculate_quote(r).model_dump() for r in requests]
+    cached = [calculator.calculate_quote(r).model_dump() for r in requests]
+    assert cached == first
+
+
+def test_json_matches_response(requests):
+    calculator = QuoteCalculator()
+    for request in requests:
+        expected = json.loads(QuoteCalculator.dump_response(calculator.calculate_quote(request)))
+        assert json.loads(calculator.calculate_quote_json(request)) == expected
+
+
+def test_batch_of_one_and_empty_batch(requests):
+    calculator = QuoteCalculator()
+    assert calculator.calculate_quotes_batch([]) == []
+    assert calculator.calculate_quotes_batch(requests[:1])[0].model_dump() == \
+        calculator.calculate_quote(requests[0]).model_dump()
+
+
+@pytest.mark.parametrize("job_type, inputs", [("residential", "commercial"), ("commercial", "residential")])
+def test_missing_inputs_raise_on_both_paths(job_type, inputs):
+    request = QuoteRequest(job_type=job_type, postal_code="M5V", **{inputs: {}})
+    calculator = QuoteCalculator()
+    with pytest.raises(ValueError):
+        calculator.calculate_quote(request)
+    with pytest.raises(ValueError):
+        calculator.calculate_quotes_batch([request])
+
+
+def test_pricing_config_is_a_fixed_snapshot(requests):
+    config = PricingConfig()
+    with pytest.raises(pydantic.ValidationError):
+        config.base_fee_residential = 0.0
+    calculator = QuoteCalculator(config)
+    before = [q.model_dump() for q in calculator.calculate_quotes_batch(requests)]
+    # Table contents can still be mutated in place; the calculator must not see it
+    config.condition_multipliers["heavy"] = 10.0
+    after = [QuoteCalculator(PricingConfig()).calculate_quote(r).model_dump() for r in requests]
+    assert [q.model_dump() for q in calculator.calculate_quotes_batch(requests)] == before == after
@@ -0,0 +1,142 @@
+"""Tests for Stripe webhook event processing and the retry store in routes/payments.py"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from routes import payments
+
+EVENT = {"id": "evt_1", "type": "payment_intent.succeeded", "data": {"object": {"id": "pi_1"}}}
+
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["cleangrid_test"]
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Handler for payment_intent.succeeded; fails while `calls["fail"]` is positive"""
+    state = {"applied": [], "fail": 0, "delay": 0.0}
+
+    async def handler(db, payment_intent):
+        await asyncio.sleep(state["delay"])
+        if state["fail"]:
+            state["fail"] -= 1
+            raise RuntimeError("handler failed")
+        state["applied"].append(payment_intent["id"])
+
+    monkeypatch.setitem(payments._EVENT_HANDLERS, "payment_intent.succeeded", handler)
+    monkeypatch.setattr(payments, "_event_queue", asyncio.Queue())
+    monkeypatch.setattr(payments, "_event_workers", [])
+    return state
+
+
+async def _make_due(db):
+    await db.stripe_event_retries.update_many({}, {"$set": {"nextAttemptAt": datetime.utcnow() - timedelta(seconds=1)}})
+
+
+def test_failed_event_is_stored_for_retry(db, calls):
+    async def run():
+        calls["fail"] = 1
+        with pytest.raises(RuntimeError):
+            await payments._process_event(db, EVENT)
+        await payments._schedule_retry(db, EVENT, "handler failed")
+        entry = await db.stripe_event_retries.find_one({"_id": "evt_1"})
+        assert entry["event"] == EVENT
+        assert entry["attempts"] == 1
+        assert entry["nextAttemptAt"] > datetime.utcnow()
+        # The dedupe record is released so the retry can apply the event
+        assert await db.stripe_events.count_documents({}) == 0
+
+    asyncio.run(run())
+
+
+def test_retry_pass_applies_due_events(db, calls):
+    async def run():
+        await payments._schedule_retry(db, EVENT, "handler failed")
+        await payments._retry_failed_events(db)
+        assert calls["applied"] == []  # not due yet
+        await _make_due(db)
+        await payments._retry_failed_events(db)
+        assert calls["applied"] == ["pi_1"]
+        assert await db.stripe_event_retries.count_documents({}) == 0
+        assert await db.stripe_events.count_documents({"_id": "evt_1"}) == 1
+
+    asyncio.run(run())
+
+
+def test_failed_retry_backs_off(db, calls):
+    async def run():
+        await payments._schedule_retry(db, EVENT, "handler failed")
+        await _make_due(db)
+        calls["fail"] = 1
+        await payments._retry_failed_events(db)
+        entry = await db.stripe_event_retries.find_one({"_id": "evt_1"})
+        assert entry["attempts"] == 2
+        assert entry["nextAttemptAt"] > datetime.utcnow() + timedelta(seconds=payments.STRIPE_EVENT_RETRY_DELAY)
+
+    asyncio.run(run())
+
+
+def test_claimed_retry_is_not_applied_twice(db, calls):
+    async def run():
+        await payments._schedule_retry(db, EVENT, "handler failed")
+        await _make_due(db)
+        calls["delay"] = 0.05
+        await asyncio.gather(payments._retry_failed_events(db), payments._retry_failed_events(db))
+        assert calls["applied"] == ["pi_1"]
+
+    asyncio.run(run())
+
+
+def test_exhausted_events_are_kept_but_not_retried(db, calls):
+    async def run():
+        for _ in range(payments.STRIPE_EVENT_MAX_ATTEMPTS):
+            await payments._schedule_retry(db, EVENT, "handler failed")
+        await _make_due(db)
+        await payments._retry_failed_events(db)
+        assert calls["applied"] == []
+        entry = await db.stripe_event_retries.find_one({"_id": "evt_1"})
+        assert entry["attempts"] == payments.STRIPE_EVENT_MAX_ATTEMPTS
+
+    asyncio.run(run())
+
+
+def test_redelivered_event_is_applied_once(db, calls):
+    async def run():
+        await payments._process_event(db, EVENT)
+        await payments._process_event(db, EVENT)
+        assert calls["applied"] == ["pi_1"]
+
+    asyncio.run(run())
+
+
+def test_shutdown_mid_handler_keeps_event_for_retry(db, calls):
+    async def run():
+        calls["delay"] = 5
+        payments.start_stripe_event_workers(db)
+        payments._event_queue.put_nowait(EVENT)
+        await asyncio.sleep(0.05)
+        await payments.stop_stripe_event_workers(db, timeout=0.05)
+        assert await db.stripe_events.count_documents({}) == 0
+        entry = await db.stripe_event_retries.find_one({"_id": "evt_1"})
+        assert entry["event"] == EVENT
+        assert entry["attempts"] == 0
+
+    asyncio.run(run())
+
+
+def test_shutdown_stores_queued_events(db, calls):
+    async def run():
+        calls["delay"] = 5
+        payments.start_stripe_event_workers(db)
+        queued = [dict(EVENT, id=f"evt_{i}") for i in range(payments.STRIPE_EVENT_WORKERS + 2)]
+        for event in queued:
+            payments._event_queue.put_nowait(event)
+        await asyncio.sleep(0.05)
+        await payments.stop_stripe_event_workers(db, timeout=0.05)
+        assert await db.stripe_event_retries.count_documents({}) == len(queued)
+
+    asyncio.run(run())
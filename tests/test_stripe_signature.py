@@ -0,0 +1,129 @@
+"""Tests for the Stripe webhook signature check in routes/payments.py"""
+import asyncio
+import hashlib
+import hmac
+import time
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes import payments
+
+SECRET = "whsec_test"
+BODY = b'{"id": "evt_1", "type": "payment_intent.succeeded"}'
+
+
+def _sign(payload: bytes, timestamp: int, secret: str = SECRET) -> str:
+    signed = f"{timestamp}.".encode() + payload
+    return hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+
+
+@pytest.fixture(autouse=True)
+def webhook_secret(monkeypatch):
+    monkeypatch.setattr(payments, "STRIPE_WEBHOOK_SECRET", SECRET)
+
+
+def test_valid_signature():
+    t = int(time.time())
+    assert payments._verify_stripe_signature(BODY, f"t={t},v1={_sign(BODY, t)}")
+
+
+def test_wrong_secret():
+    t = int(time.time())
+    header = f"t={t},v1={_sign(BODY, t, secret='whsec_other')}"
+    assert not payments._verify_stripe_signature(BODY, header)
+
+
+def test_tampered_body():
+    t = int(time.time())
+    header = f"t={t},v1={_sign(BODY, t)}"
+    assert not payments._verify_stripe_signature(BODY.replace(b"succeeded", b"canceled"), header)
+
+
+def test_stale_timestamp():
+    t = int(time.time()) - payments.WEBHOOK_TOLERANCE_SECONDS - 1
+    assert not payments._verify_stripe_signature(BODY, f"t={t},v1={_sign(BODY, t)}")
+
+
+def test_signed_timestamp_cannot_be_swapped():
+    t = int(time.time())
+    header = f"t={t - 1},v1={_sign(BODY, t)}"
+    assert not payments._verify_stripe_signature(BODY, header)
+
+
+def test_multiple_v1_entries():
+    # During secret rotation Stripe sends one v1 per active secret
+    t = int(time.time())
+    other = _sign(BODY, t, secret="whsec_old")
+    assert payments._verify_stripe_signature(BODY, f"t={t},v1={other},v1={_sign(BODY, t)}")
+    assert payments._verify_stripe_signature(BODY, f"t={t},v1={_sign(BODY, t)},v1={other}")
+    assert not payments._verify_stripe_signature(BODY, f"t={t},v1={other},v1={'0' * 64}")
+
+
+def test_v0_entries_are_ignored():
+    t = int(time.time())
+    assert not payments._verify_stripe_signature(BODY, f"t={t},v0={_sign(BODY, t)}")
+
+
+@pytest.mark.parametrize("header", [
+    None,
+    "",
+    "garbage",
+    "t=,v1=abc",
+    "v1=abc",
+    "t=123",
+    "t=notanumber,v1=abc",
+    f"t={int(time.time())},v1=",
+    f"t={int(time.time())},v1=zz",
+    f"t={int(time.time())},v1=\u00e9\u00e9",
+    ",,,",
+])
+def test_malformed_header(header):
+    assert not payments._verify_stripe_signature(BODY, header)
+
+
+def test_non_utf8_body():
+    body = b"\xff\xfe"
+    t = int(time.time())
+    assert not payments._verify_stripe_signature(body, f"t={t},v1={'0' * 64}")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(payments, "_event_queue", asyncio.Queue())
+    app = FastAPI()
+    app.include_router(payments.router)
+    return TestClient(app)
+
+
+def _post_signed(client, event) -> int:
+    body = orjson.dumps(event)
+    t = int(time.time())
+    response = client.post("/payments/webhook", content=body, headers={"stripe-signature": f"t={t},v1={_sign(body, t)}"})
+    return response.status_code
+
+
+def test_webhook_queues_signed_event(client):
+    event = {"id": "evt_1", "type": "payment_intent.succeeded", "data": {"object": {"id": "pi_1"}}}
+    assert _post_signed(client, event) == 200
+    assert payments._event_queue.get_nowait() == event
+
+
+@pytest.mark.parametrize("event", [
+    {"id": "evt_1", "data": {"object": {}}},
+    {"type": "payment_intent.succeeded", "data": {"object": {}}},
+    {"id": "evt_1", "type": "payment_intent.succeeded"},
+    {"id": "evt_1", "type": "payment_intent.succeeded", "data": {}},
+    ["not", "an", "event"],
+])
+def test_webhook_rejects_signed_malformed_event(client, event):
+    assert _post_signed(client, event) == 400
+    assert payments._event_queue.empty()
+
+
+def test_webhook_rejects_bad_signature(client):
+    body = b'{"id": "evt_1", "type": "payment_intent.succeeded", "data": {"object": {}}}'
+    response = client.post("/payments/webhook", content=body, headers={"stripe-signature": "t=1,v1=00"})
+    assert response.status_code == 400